@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Acquisition sans interface graphique, pour les bancs qui tournent seuls.
+
+Utilise le même SerialWorker que la fenêtre principale, dans un QThread,
+avec une boucle d'événements QCoreApplication : aucun widget ni pyqtgraph
+n'est importé. Exemple :
+
+    python acquisition_sans_ihm.py --port COM3 --pas 100 --duree 3600 \\
+        --tension 5 --courant 0.5 --sortie mesures.csv
+
+Le fichier .csv est écrit au fil de l'eau ; avec l'extension .rsm (format
+binaire en colonnes) les mesures sont gardées en mémoire et écrites à la fin.
+Ctrl+C arrête proprement l'acquisition (la sortie est remise à zéro à la
+fermeture du port, comme dans l'interface).
+"""
+
+import argparse
+import pathlib
+import signal
+import sys
+import time
+
+from PyQt5.QtCore import QCoreApplication, QDateTime, QMetaObject, QObject, QThread, QTimer, Qt, pyqtSignal, pyqtSlot
+
+from worker_serie import SerialWorker
+from enregistreur import StreamingLogger, VIDAGE_FLUSH, VIDAGE_FSYNC
+from stockage import MeasurementStore
+import fichier_binaire
+from metriques import MetricsExporter
+
+
+class HeadlessRunner(QObject):
+    """Ouvre le port, applique les consignes, mesure pendant la durée demandée puis ferme."""
+
+    open_port_signal = pyqtSignal(str, int)
+    close_port_signal = pyqtSignal()
+    start_timer_read_signal = pyqtSignal(int)
+    stop_timer_read_signal = pyqtSignal()
+    simulation_signal = pyqtSignal(bool)
+
+    def __init__(self, options, parent=None):
+        super().__init__(parent)
+        self.options = options
+        self.code_retour = 0
+        self.nb_mesures = 0
+        self.idn = ""
+        self._t_origine = None
+        self._debut = None
+        self._arret_en_cours = False
+
+        self.thread = QThread()
+        self.thread.setObjectName("worker")
+        self.worker = SerialWorker()
+        self.worker.moveToThread(self.thread)
+        self.open_port_signal.connect(self.worker._open_port)
+        self.close_port_signal.connect(self.worker._close_port)
+        self.start_timer_read_signal.connect(self.worker._start_acquisition)
+        self.stop_timer_read_signal.connect(self.worker._stop_acquisition)
+        self.simulation_signal.connect(self.worker.signal_simu_received)
+        self.worker.port_status.connect(self._on_port_status)
+        self.worker.error_occurred.connect(self._on_erreur)
+        self.worker.identification.connect(self._on_identification)
+        self.worker.table_mesures_ready.connect(self._on_mesure)
+        if options.verbeux:
+            self.worker.data_received.connect(self._afficher)
+            self.worker.cadence_acquisition.connect(self._on_cadence)
+
+        self._sortie = pathlib.Path(options.sortie)
+        self._binaire = self._sortie.suffix.lower() == fichier_binaire.EXTENSION
+        if self._binaire:
+            self.mesures = MeasurementStore()
+            self.journal = None
+        else:
+            self.mesures = None
+            self.journal = StreamingLogger(self._sortie.parent, VIDAGE_FSYNC if options.fsync else VIDAGE_FLUSH)
+            self.journal.erreur.connect(self._on_erreur)
+        self.metriques = None
+        if options.metriques:
+            self.metriques = MetricsExporter(options.metriques)
+            self.worker.metriques_pretes.connect(self._on_metriques)
+
+    def demarrer(self):
+        self.thread.start()
+        self.simulation_signal.emit(self.options.simulation)
+        self.open_port_signal.emit(self.options.port, self.options.baud)
+
+    @pyqtSlot(bool, str)
+    def _on_port_status(self, ok, message):
+        self._afficher(message)
+        if self._arret_en_cours:
+            return
+        if not ok:
+            self.code_retour = 1
+            self.arreter()
+            return
+        if not self.options.simulation:
+            # Consignes initiales mises en file dans l'ordre, sans le regroupement de SetpointChannel
+            # (qui les espacerait) : OUT1 ne part qu'après VSET1 et ISET1
+            if self.options.tension is not None:
+                self.worker._send_command(f"VSET1:{self.options.tension}")
+            if self.options.courant is not None:
+                self.worker._send_command(f"ISET1:{self.options.courant}")
+            if self.options.sortie_active:
+                self.worker._set_output(1)
+        self.start_timer_read_signal.emit(self.options.pas)
+        if self.options.duree > 0:
+            QTimer.singleShot(int(self.options.duree * 1000), self.arreter)
+
+    @pyqtSlot(list)
+    def _on_mesure(self, echantillon):
+        if self._arret_en_cours:
+            return
+        instant, tension, courant = echantillon
+        if self._t_origine is None:
+            self._t_origine = instant
+            self._debut = QDateTime.currentDateTime()
+            if self.journal is not None:
+                self.journal.nouvelle_session(self._sortie)
+        temps = instant - self._t_origine
+        if self.journal is not None:
+            self.journal.ajouter(temps, tension, courant)
+            self.journal.envoyer()
+        else:
+            self.mesures.ajouter(temps, tension, courant)
+        self.nb_mesures += 1
+
+    @pyqtSlot()
+    def arreter(self):
+        """Arrête l'acquisition, ferme le port et le fichier, puis quitte la boucle d'événements."""
+        if self._arret_en_cours:
+            return
+        self._arret_en_cours = True
+        self.stop_timer_read_signal.emit()
+        # Fermeture du port (remise à zéro de l'alimentation) dans le thread du worker
+        self.close_port_signal.emit()
+        # quit() peut abandonner les événements en attente : on attend que la fermeture soit faite
+        QMetaObject.invokeMethod(self.worker, "_synchroniser", Qt.BlockingQueuedConnection)
+        self.thread.quit()
+        self.thread.wait()
+        # Derniers signaux du worker (métriques émises à la fermeture du port)
+        QCoreApplication.processEvents()
+        if self.journal is not None:
+            self.journal.arreter()
+        elif self.nb_mesures:
+            try:
+                fichier_binaire.ecrire(self._sortie, self.mesures.noms, self.mesures.colonnes(), self.metadonnees())
+            except (OSError, ValueError) as e:
+                self._on_erreur(f"Erreur lors de l'enregistrement binaire : {e}")
+                self.code_retour = 1
+        self._afficher(f"{self.nb_mesures} mesure(s) enregistrée(s) dans {self._sortie}")
+        QCoreApplication.exit(self.code_retour)
+
+    def metadonnees(self):
+        return {
+            "idn": self.idn,
+            "consigne_tension": self.options.tension,
+            "consigne_courant": self.options.courant,
+            "pas_mesures_ms": self.options.pas,
+            "debut": self._debut.toString(Qt.ISODateWithMs) if self._debut is not None else None,
+            "unites": {"temps": "s", "tension": "V", "courant": "A"},
+        }
+
+    @pyqtSlot(object)
+    def _on_metriques(self, instantane):
+        try:
+            self.metriques.mettre_a_jour(1, instantane)
+        except OSError as e:
+            self._on_erreur(f"Écriture des métriques impossible : {e}")
+
+    @pyqtSlot(str)
+    def _on_identification(self, idn):
+        self.idn = idn.strip()
+        self._afficher(f"Appareil : {self.idn}")
+
+    @pyqtSlot(str)
+    def _on_erreur(self, message):
+        print(f"Erreur: {message}", file=sys.stderr, flush=True)
+
+    @pyqtSlot(float, int)
+    def _on_cadence(self, echantillons_par_s, manquees):
+        self._afficher(f"{echantillons_par_s:.1f} éch/s, {manquees} manquée(s)")
+
+    def _afficher(self, message):
+        if not self.options.silencieux:
+            print(message, file=sys.stderr, flush=True)
+
+
+def analyser_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Acquisition RS-3005P sans interface graphique")
+    parser.add_argument("--port", default="COM1", help="port série (COM3, /dev/ttyUSB0...)")
+    parser.add_argument("--baud", type=int, default=9600, help="vitesse du port (bauds)")
+    parser.add_argument("--pas", type=int, default=100, help="pas des mesures (ms)")
+    parser.add_argument("--duree", type=float, default=0, help="durée de l'acquisition (s), 0 = jusqu'à Ctrl+C")
+    parser.add_argument("--tension", type=float, default=None, help="consigne de tension (V)")
+    parser.add_argument("--courant", type=float, default=None, help="consigne de courant (A)")
+    parser.add_argument("--sortie-active", action="store_true", help="active la sortie (OUT1) après les consignes")
+    parser.add_argument("--sortie", default="mesures_" + time.strftime("%Y-%m-%d_%H.%M.%S") + ".csv",
+                        help="fichier de sortie (.csv écrit au fil de l'eau, ou .rsm binaire)")
+    parser.add_argument("--fsync", action="store_true", help="force l'écriture sur le disque à chaque vidage")
+    parser.add_argument("--metriques", default=None,
+                        help="fichier des métriques (format texte de Prometheus), réécrit chaque seconde")
+    parser.add_argument("--profil", action="store_true",
+                        help="enregistre la durée des chemins critiques (trace écrite à la sortie, voir profilage.py)")
+    parser.add_argument("--simulation", action="store_true", help="mesures simulées, sans appareil")
+    parser.add_argument("-v", "--verbeux", action="store_true", help="affiche les réponses et la cadence obtenue")
+    parser.add_argument("-q", "--silencieux", action="store_true", help="n'affiche que les erreurs")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    options = analyser_arguments(arguments)
+    app = QCoreApplication(sys.argv[:1])
+    runner = HeadlessRunner(options)
+    # Ctrl+C : arrêt propre. Le timer rend la main à Python pour qu'il traite le signal.
+    signal.signal(signal.SIGINT, lambda *args: QTimer.singleShot(0, runner.arreter))
+    veille = QTimer()
+    veille.timeout.connect(lambda: None)
+    veille.start(200)
+    QTimer.singleShot(0, runner.demarrer)
+    return app.exec_()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,9 @@
+# ui-sha256: 93424f3db535767b4810367746cb0e1dd9344482251d5431cb2978ab2b0cb769
 # -*- coding: utf-8 -*-
 
-# Form implementation generated from reading ui file 'C:\Users\gaspard.guidetti\Desktop\stage\projets\projet GUI power supply\project_RS_3005P\alimlabo.ui'
+# Form implementation generated from reading ui file 'alimlabo.ui'
 #
-# Created by: PyQt5 UI code generator 5.15.10
+# Created by: PyQt5 UI code generator 5.15.11
 #
 # WARNING: Any manual changes made to this file will be lost when pyuic5 is
 # run again.  Do not edit this file unless you know what you are doing.
@@ -26,7 +27,7 @@ class Ui_MainWindow(object):
         self.btnOn.setMouseTracking(False)
         self.btnOn.setText("")
         icon = QtGui.QIcon()
-        icon.addPixmap(QtGui.QPixmap("C:\\Users\\gaspard.guidetti\\Desktop\\stage\\projets\\projet GUI power supply\\project_RS_3005P\\Simpleicons_Interface_power-symbol-1.svg"), QtGui.QIcon.Normal, QtGui.QIcon.Off)
+        icon.addPixmap(QtGui.QPixmap("Simpleicons_Interface_power-symbol-1.svg"), QtGui.QIcon.Normal, QtGui.QIcon.Off)
         self.btnOn.setIcon(icon)
         self.btnOn.setCheckable(False)
         self.btnOn.setAutoRepeat(False)
@@ -110,7 +111,7 @@ class Ui_MainWindow(object):
         self.led_pn.setGeometry(QtCore.QRect(340, 710, 61, 61))
         self.led_pn.setText("")
         self.led_pn.setObjectName("led_pn")
-        self.Donnees = QtWidgets.QTableWidget(self.centralwidget)
+        self.Donnees = QtWidgets.QTableView(self.centralwidget)
         self.Donnees.setGeometry(QtCore.QRect(1350, 130, 471, 481))
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
         sizePolicy.setHorizontalStretch(0)
@@ -119,14 +120,6 @@ class Ui_MainWindow(object):
         self.Donnees.setSizePolicy(sizePolicy)
         self.Donnees.setMinimumSize(QtCore.QSize(350, 0))
         self.Donnees.setObjectName("Donnees")
-        self.Donnees.setColumnCount(3)
-        self.Donnees.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        self.Donnees.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.Donnees.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.Donnees.setHorizontalHeaderItem(2, item)
         self.Donnees.horizontalHeader().setCascadingSectionResizes(False)
         self.Donnees.horizontalHeader().setDefaultSectionSize(150)
         self.pasMesures = QtWidgets.QSpinBox(self.centralwidget)
@@ -183,7 +176,7 @@ class Ui_MainWindow(object):
         self.entreeCommande.setDragEnabled(True)
         self.entreeCommande.setClearButtonEnabled(True)
         self.entreeCommande.setObjectName("entreeCommande")
-        self.console = QtWidgets.QTextEdit(self.centralwidget)
+        self.console = QtWidgets.QPlainTextEdit(self.centralwidget)
         self.console.setEnabled(True)
         self.console.setGeometry(QtCore.QRect(730, 690, 571, 231))
         self.console.setObjectName("console")
@@ -637,12 +630,6 @@ class Ui_MainWindow(object):
         self.label_7.setText(_translate("MainWindow", "Modes :"))
         self.led_pn.setToolTip(_translate("MainWindow", "Led indicatrice Sortie"))
         self.Donnees.setToolTip(_translate("MainWindow", "Tableau des donnees des mesures"))
-        item = self.Donnees.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "Temps(s)"))
-        item = self.Donnees.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "Volts(V)"))
-        item = self.Donnees.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "Ampere(A)"))
         self.pasMesures.setToolTip(_translate("MainWindow", "Change le temp d\'intervalle entre chaque mesure"))
         self.label.setToolTip(_translate("MainWindow", "Numero du port serial qui se connecte avec l\'appareil"))
         self.label.setText(_translate("MainWindow", "Port COM :"))
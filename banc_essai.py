@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+"""
+Banc d'essai de l'acquisition, de bout en bout, sans matériel.
+
+Lance emulateur_rs3005p.py dans un autre processus (pour ne pas partager
+le GIL avec le worker), y connecte un SerialWorker, ou la fenêtre
+principale complète avec --ihm (plateforme Qt "offscreen" par défaut),
+et acquiert pendant la durée demandée. Les résultats sont écrits en JSON
+pour suivre les régressions d'une version à l'autre :
+
+  - échantillons par seconde, échéances manquées, échantillons perdus ;
+  - latence des requêtes (envoi -> réponse) par commande : p50, p90, p99, max ;
+  - timeouts et erreurs signalées par le worker ;
+  - durée des rafraîchissements de l'affichage (--ihm) et retard de la
+    boucle d'événements du thread principal ;
+  - croissance de la mémoire (RSS) par tranche de 10 000 échantillons.
+
+    python banc_essai.py --duree 20 --pas 1 --sortie resultats.json
+    python banc_essai.py --ihm --baud 9600 --latence 0.002 --perte 0.01 --timeout 100
+    python banc_essai.py --duree 5 --profil     # + trace des chemins critiques (profilage.py)
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from PyQt5.QtCore import QCoreApplication, QMetaObject, QObject, QThread, QTimer, Qt, Q_ARG, pyqtSignal, pyqtSlot
+
+
+DOSSIER = pathlib.Path(__file__).resolve().parent
+# Les échantillons sont comptés par tranches de cette taille pour la mémoire
+TRANCHE_MEMOIRE = 10000
+# Période du timer qui mesure le retard de la boucle d'événements (ms)
+PERIODE_SONDE_MS = 10
+# Options transmises telles quelles à l'émulateur
+OPTIONS_EMULATEUR = ("latence", "gigue", "baud", "fragmentation", "perte", "corruption", "parasite", "graine")
+
+
+def memoire_rss():
+    """Mémoire résidente du processus (octets), None si elle n'est pas disponible."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def percentiles(valeurs_s):
+    """Résumé d'une suite de durées (s), en millisecondes."""
+    if len(valeurs_s) == 0:
+        return {"n": 0}
+    ms = np.asarray(valeurs_s) * 1000.0
+    p50, p90, p99 = np.percentile(ms, (50, 90, 99))
+    return {"n": len(ms), "moyenne": round(float(ms.mean()), 4), "p50": round(float(p50), 4),
+            "p90": round(float(p90), 4), "p99": round(float(p99), 4), "max": round(float(ms.max()), 4)}
+
+
+class ReleveTransactions:
+    """
+    Observateur des transactions du worker (appelé dans son thread).
+    Les latences sont rangées dans un tableau alloué d'avance : le relevé
+    ne fait pas grossir la mémoire pendant la mesure.
+    """
+
+    def __init__(self, capacite):
+        self.latences = np.full(capacite, np.nan)
+        self.commandes = np.zeros(capacite, dtype=np.int16)
+        self.noms = []
+        self._codes = {}
+        self.n = 0
+        self.sans_reponse = 0     # commandes sans réponse attendue
+        self.timeouts = 0
+        self.non_releves = 0      # transactions au-delà de la capacité
+
+    def __call__(self, transaction):
+        if not transaction.attend_reponse:
+            self.sans_reponse += 1
+            return
+        if transaction.reponse is None:
+            # Comme WorkerMetrics : une écriture échouée n'est pas un timeout
+            self.timeouts += transaction.ecrite
+            return
+        if self.n >= len(self.latences):
+            self.non_releves += 1
+            return
+        code = self._codes.get(transaction.commande)
+        if code is None:
+            code = self._codes[transaction.commande] = len(self.noms)
+            self.noms.append(transaction.commande)
+        self.commandes[self.n] = code
+        self.latences[self.n] = transaction.t_reponse - transaction.t_envoi
+        self.n += 1
+
+    def par_commande(self):
+        latences, commandes = self.latences[:self.n], self.commandes[:self.n]
+        return {nom: percentiles(latences[commandes == code]) for code, nom in enumerate(self.noms)}
+
+
+class Emulateur:
+    """emulateur_rs3005p.py dans un sous-processus."""
+
+    def __init__(self, options):
+        commande = [sys.executable, str(DOSSIER / "emulateur_rs3005p.py")]
+        for nom in OPTIONS_EMULATEUR:
+            valeur = getattr(options, nom)
+            if valeur is not None:
+                commande += [f"--{nom}", str(valeur)]
+        self._processus = subprocess.Popen(commande, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                           universal_newlines=True)
+        self.port = self._processus.stdout.readline().strip()
+        if not self.port:
+            raise OSError(f"L'émulateur n'a pas démarré : {self._processus.stderr.read().strip()}")
+
+    def arreter(self):
+        """Arrête l'émulateur et renvoie ses compteurs."""
+        self._processus.terminate()
+        _, erreurs = self._processus.communicate(timeout=10)
+        statistiques = {}
+        for morceau in erreurs.strip().splitlines()[-1:][0].split(",") if erreurs.strip() else []:
+            nom, _, nombre = morceau.partition(":")
+            if nombre.strip().isdigit():
+                statistiques[nom.strip()] = int(nombre)
+        return statistiques
+
+
+class Banc(QObject):
+    """Pilote le worker (ou la fenêtre) et collecte les mesures de performance."""
+
+    open_port_signal = pyqtSignal(str, int)
+    close_port_signal = pyqtSignal()
+    start_timer_read_signal = pyqtSignal(int)
+    stop_timer_read_signal = pyqtSignal()
+
+    def __init__(self, options, port, parent=None):
+        super().__init__(parent)
+        self.options = options
+        self.port = port
+        self.fenetre = None
+        self.thread = None
+        if options.ihm:
+            # Import tardif : sans --ihm, aucun widget n'est chargé
+            from ihm_rs3005p import MainWindow
+            self._sessions = tempfile.TemporaryDirectory(prefix="banc_essai_")
+            MainWindow.DOSSIER_SESSIONS = pathlib.Path(self._sessions.name)
+            self.fenetre = MainWindow()
+            self.worker = self.fenetre.worker
+            # La fenêtre tente d'ouvrir son port (COMx) dès sa création : on attend que le worker
+            # ait traité cette tentative, son échec ne doit pas arriver dans _on_port_status
+            QMetaObject.invokeMethod(self.worker, "_synchroniser", Qt.BlockingQueuedConnection)
+            # Durée de chaque rafraîchissement de l'affichage
+            rafraichir = self.fenetre.presentation._rafraichir
+            def rafraichir_chronometre(echantillons):
+                debut = time.perf_counter()
+                rafraichir(echantillons)
+                self.durees_images.append(time.perf_counter() - debut)
+            self.fenetre.presentation._rafraichir = rafraichir_chronometre
+            self.open_port_signal.connect(self.fenetre.open_port_signal)
+            self.close_port_signal.connect(self.fenetre.close_port_signal)
+            self.start_timer_read_signal.connect(self.fenetre.start_timer_read_signal)
+            self.stop_timer_read_signal.connect(self.fenetre.stop_timer_read_signal)
+        else:
+            from worker_serie import SerialWorker
+            self.thread = QThread()
+            self.worker = SerialWorker()
+            self.worker.moveToThread(self.thread)
+            self.open_port_signal.connect(self.worker._open_port)
+            self.close_port_signal.connect(self.worker._close_port)
+            self.start_timer_read_signal.connect(self.worker._start_acquisition)
+            self.stop_timer_read_signal.connect(self.worker._stop_acquisition)
+        self.worker.port_status.connect(self._on_port_status)
+        self.worker.table_mesures_ready.connect(self._on_mesure)
+        self.worker.error_occurred.connect(self._on_erreur)
+        self.worker.cadence_acquisition.connect(self._on_cadence)
+        # Au plus quelques milliers de transactions par seconde sur un pty
+        self.releve = ReleveTransactions(int(options.duree * 20000) + 1000)
+        # Les métriques du worker restent tenues pendant la mesure
+        self._observateur_worker = metriques = self.worker._transactions.observateur
+        def observateur(transaction):
+            self.releve(transaction)
+            metriques(transaction)
+        self.worker._transactions.observateur = observateur
+        self.worker.metriques_pretes.connect(self._on_metriques)
+        self.metriques = None
+
+        self.code_retour = 0
+        self.nb_echantillons = 0
+        self.nb_erreurs = 0
+        self.manquees = 0
+        self.durees_images = []
+        self.retards_boucle = []
+        self.memoire = []          # (échantillons, RSS)
+        self._t_debut = None
+        self._t_fin = None
+        self._sonde = QTimer(self)
+        self._sonde.setTimerType(Qt.PreciseTimer)
+        self._sonde.setInterval(PERIODE_SONDE_MS)
+        self._sonde.timeout.connect(self._on_sonde)
+        self._t_sonde = None
+
+    def demarrer(self):
+        if self.thread is not None:
+            self.thread.start()
+        if self.options.timeout:
+            QMetaObject.invokeMethod(self.worker, "_set_default_query_timeout", Qt.QueuedConnection,
+                                     Q_ARG(int, self.options.timeout))
+        if self.fenetre is not None:
+            self.fenetre.show()
+            # Enregistrement dans le tableau, le graphique et le fichier de session
+            self.fenetre.TimerStartMesure()
+        self.open_port_signal.emit(self.port, self.options.baud or 9600)
+
+    @pyqtSlot(bool, str)
+    def _on_port_status(self, ok, message):
+        if self._t_fin is not None:
+            return
+        if not ok:
+            print(message, file=sys.stderr)
+            self.code_retour = 1
+            self.arreter()
+            return
+        self.start_timer_read_signal.emit(self.options.pas)
+        QTimer.singleShot(int(self.options.duree * 1000), self.arreter)
+        self._t_sonde = time.perf_counter()
+        self._sonde.start()
+
+    @pyqtSlot(list)
+    def _on_mesure(self, echantillon):
+        if self._t_fin is not None:
+            return
+        if self._t_debut is None:
+            self._t_debut = time.perf_counter()
+            self.memoire.append((0, memoire_rss()))
+        self.nb_echantillons += 1
+        if self.nb_echantillons % TRANCHE_MEMOIRE == 0:
+            self.memoire.append((self.nb_echantillons, memoire_rss()))
+
+    @pyqtSlot(str)
+    def _on_erreur(self, message):
+        self.nb_erreurs += 1
+
+    @pyqtSlot(float, int)
+    def _on_cadence(self, echantillons_par_s, manquees):
+        self.manquees = manquees
+
+    @pyqtSlot(object)
+    def _on_metriques(self, instantane):
+        self.metriques = instantane
+
+    @pyqtSlot()
+    def _on_sonde(self):
+        maintenant = time.perf_counter()
+        self.retards_boucle.append(max(maintenant - self._t_sonde - PERIODE_SONDE_MS / 1000.0, 0.0))
+        self._t_sonde = maintenant
+
+    @pyqtSlot()
+    def arreter(self):
+        if self._t_fin is not None:
+            return
+        self._t_fin = time.perf_counter()
+        self._sonde.stop()
+        self.memoire.append((self.nb_echantillons, memoire_rss()))
+        self.stop_timer_read_signal.emit()
+        # Le worker a traité l'arrêt quand l'appel bloquant revient : plus aucune transaction ne démarre
+        QMetaObject.invokeMethod(self.worker, "_synchroniser", Qt.BlockingQueuedConnection)
+        self.worker._transactions.observateur = self._observateur_worker
+        if self.fenetre is not None:
+            self.fenetre.close()
+        else:
+            self.close_port_signal.emit()
+            QMetaObject.invokeMethod(self.worker, "_synchroniser", Qt.BlockingQueuedConnection)
+            self.thread.quit()
+            self.thread.wait()
+        # Instantané émis par le worker à la fermeture du port
+        QCoreApplication.processEvents()
+        QCoreApplication.exit(self.code_retour)
+
+    def resultats(self):
+        duree = (self._t_fin - self._t_debut) if self._t_debut is not None else 0.0
+        releve = self.releve
+        attendus = int(duree * 1000 / self.options.pas) + 1 if duree else 0
+        return {
+            "duree_s": round(duree, 3),
+            "echantillons": self.nb_echantillons,
+            "echantillons_par_s": round(self.nb_echantillons / duree, 2) if duree else 0.0,
+            "echantillons_attendus": attendus,
+            "echeances_manquees": self.manquees,
+            "requetes": releve.n + releve.timeouts + releve.non_releves,
+            "commandes_sans_reponse": releve.sans_reponse,
+            "timeouts": releve.timeouts,
+            "erreurs": self.nb_erreurs,
+            "latence_requetes_ms": releve.par_commande(),
+            "latence_toutes_requetes_ms": percentiles(releve.latences[:releve.n]),
+            "duree_images_ms": percentiles(self.durees_images) if self.fenetre is not None else None,
+            "retard_boucle_ms": percentiles(self.retards_boucle),
+            "memoire": self._croissance_memoire(),
+            # Métriques du worker à la fermeture du port (voir metriques.py)
+            "metriques_worker": self.metriques,
+        }
+
+    def _croissance_memoire(self):
+        points = [(n, rss) for n, rss in self.memoire if rss is not None]
+        resultat = {"rss_debut_octets": points[0][1] if points else None,
+                    "rss_fin_octets": points[-1][1] if points else None,
+                    "octets_par_10k_echantillons": None}
+        if len(points) >= 2 and points[-1][0] > points[0][0]:
+            n, rss = np.asarray(points, dtype=float).T
+            # Pente de la droite des moindres carrés RSS = f(échantillons)
+            pente = np.polyfit(n, rss, 1)[0] if len(points) > 2 else (rss[-1] - rss[0]) / (n[-1] - n[0])
+            resultat["octets_par_10k_echantillons"] = int(round(pente * TRANCHE_MEMOIRE))
+        return resultat
+
+
+def analyser_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai de l'acquisition RS-3005P (émulateur sur pty)")
+    parser.add_argument("--duree", type=float, default=10.0, help="durée de l'acquisition (s)")
+    parser.add_argument("--pas", type=int, default=1, help="pas des mesures demandé (ms)")
+    parser.add_argument("--ihm", action="store_true", help="acquisition par la fenêtre principale complète")
+    parser.add_argument("--timeout", type=int, default=None, help="timeout des requêtes du worker (ms)")
+    parser.add_argument("--sortie", default="banc_essai_" + time.strftime("%Y-%m-%d_%H.%M.%S") + ".json",
+                        help="fichier JSON des résultats (- pour la sortie standard)")
+    parser.add_argument("--profil", action="store_true",
+                        help="enregistre la durée des chemins critiques (trace écrite à la sortie, voir profilage.py)")
+    groupe = parser.add_argument_group("émulateur")
+    groupe.add_argument("--latence", type=float, default=None, help="temps de réponse de l'appareil (s)")
+    groupe.add_argument("--gigue", type=float, default=None, help="variation aléatoire de la latence (s)")
+    groupe.add_argument("--baud", type=int, default=None, help="débit simulé de la ligne (bauds)")
+    groupe.add_argument("--fragmentation", type=float, default=None, help="probabilité de couper une réponse")
+    groupe.add_argument("--perte", type=float, default=None, help="probabilité de ne pas répondre")
+    groupe.add_argument("--corruption", type=float, default=None, help="probabilité d'inverser un bit")
+    groupe.add_argument("--parasite", type=float, default=None, help="probabilité d'ajouter un octet")
+    groupe.add_argument("--graine", type=int, default=None, help="graine des tirages aléatoires")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    options = analyser_arguments(arguments)
+    if options.profil:
+        # Lue par profilage à son premier import (par les modules du worker, importés par Banc)
+        os.environ.setdefault("RS3005P_PROFIL", "1")
+    if options.ihm:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication(sys.argv[:1])
+    else:
+        from PyQt5.QtCore import QCoreApplication
+        app = QCoreApplication(sys.argv[:1])
+
+    emulateur = Emulateur(options)
+    try:
+        banc = Banc(options, emulateur.port)
+        QTimer.singleShot(0, banc.demarrer)
+        app.exec_()
+    finally:
+        statistiques_emulateur = emulateur.arreter()
+
+    resultats = {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "systeme": platform.platform(),
+                    "processeur": platform.processor() or platform.machine()},
+        "parametres": {nom: valeur for nom, valeur in vars(options).items() if nom != "sortie"},
+        "resultats": banc.resultats(),
+        "emulateur": statistiques_emulateur,
+    }
+    texte = json.dumps(resultats, indent=2, ensure_ascii=False)
+    if options.sortie == "-":
+        print(texte)
+    else:
+        pathlib.Path(options.sortie).write_text(texte + "\n", encoding="utf-8")
+        r = resultats["resultats"]
+        print(f"{r['echantillons_par_s']} éch/s, p50 {r['latence_toutes_requetes_ms'].get('p50')} ms, "
+              f"{r['timeouts']} timeout(s) -> {options.sortie}", file=sys.stderr)
+    return banc.code_retour
+
+
+if __name__ == '__main__':
+    sys.exit(main())
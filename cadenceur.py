@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Cadenceur d'acquisition, exécuté dans le thread du worker.
+
+Chaque mesure est programmée par rapport à une échéance absolue
+(t0 + k * période) avec un timer précis : les retards ne s'accumulent pas.
+Si la mesure précédente n'est pas terminée à l'échéance, ou si on a pris
+plus d'une période de retard, les échéances dépassées sont sautées (et
+comptées) au lieu d'être empilées.
+"""
+
+import math
+import time
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal, pyqtSlot
+
+
+class AcquisitionScheduler(QObject):
+    """
+    lancer() est appelée à chaque échéance et doit renvoyer False si la
+    mesure précédente est encore en cours. echantillon_termine() doit être
+    appelée à chaque mesure reçue ; la cadence obtenue et le nombre
+    d'échéances manquées sont émis par cadence_mesuree environ une fois par
+    seconde.
+    """
+
+    cadence_mesuree = pyqtSignal(float, int)  # (échantillons/s, échéances manquées)
+
+    PERIODE_RAPPORT_S = 1.0
+
+    def __init__(self, lancer, parent=None):
+        super().__init__(parent)
+        self._lancer = lancer
+        self._periode = 1.0
+        self._t0 = 0.0
+        self._k = 0                  # numéro de la prochaine échéance
+        self.manquees = 0            # échéances sautées depuis le démarrage
+        self._manquees_avant = 0     # échéances sautées lors des démarrages précédents
+        self._nb_echantillons = 0    # échantillons reçus depuis le dernier rapport
+        self._t_rapport = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_echeance)
+
+    @property
+    def actif(self):
+        return self._timer.isActive()
+
+    @property
+    def manquees_total(self):
+        """Échéances sautées depuis la création, tous démarrages confondus."""
+        return self._manquees_avant + self.manquees
+
+    @pyqtSlot(int)
+    def demarrer(self, periode_ms):
+        """
+        (Re)démarre l'acquisition avec une nouvelle période. Première mesure
+        immédiate au démarrage ; lors d'un redémarrage (acquisition active
+        et déjà une mesure lancée), la suivante est à une période : pas de
+        deuxième mesure juste après la précédente.
+        """
+        redemarrage = self._timer.isActive() and self._k > 0
+        self._periode = max(periode_ms, 1) / 1000.0
+        self._t0 = time.perf_counter()
+        self._k = 1 if redemarrage else 0
+        self._manquees_avant += self.manquees
+        self.manquees = 0
+        self._nb_echantillons = 0
+        self._t_rapport = self._t0
+        self._programmer()
+
+    @pyqtSlot()
+    def arreter(self):
+        self._timer.stop()
+
+    def echantillon_termine(self):
+        self._nb_echantillons += 1
+        maintenant = time.perf_counter()
+        duree = maintenant - self._t_rapport
+        if duree >= self.PERIODE_RAPPORT_S:
+            self.cadence_mesuree.emit(self._nb_echantillons / duree, self.manquees)
+            self._nb_echantillons = 0
+            self._t_rapport = maintenant
+
+    def _programmer(self):
+        attente = self._t0 + self._k * self._periode - time.perf_counter()
+        self._timer.start(max(int(round(attente * 1000)), 0))
+
+    @pyqtSlot()
+    def _on_echeance(self):
+        maintenant = time.perf_counter()
+        # Échéances entièrement dépassées (thread occupé, ordinateur en veille...)
+        en_retard = math.floor((maintenant - self._t0) / self._periode) - self._k
+        if en_retard > 0:
+            self.manquees += en_retard
+            self._k += en_retard
+        if not self._lancer():
+            # La mesure précédente n'est pas finie : on saute cette échéance
+            self.manquees += 1
+        self._k += 1
+        self._programmer()
@@ -1,11 +1,17 @@
 from PyQt5.QtWidgets import QLabel, QWidget
-from PyQt5.QtCore import pyqtSlot, pyqtSignal, Qt
- 
+from PyQt5.QtCore import pyqtSlot, pyqtSignal, Qt, QRectF
+from PyQt5.QtGui import QColor, QLinearGradient, QPainter, QPixmap
+
 class PyLedLabel(QLabel):
     """
     Une classe QLabel personnalisée qui se comporte comme une LED avec différents états.
+
+    Chaque état est dessiné une seule fois dans un QPixmap partagé par toutes
+    les LEDs (pas de feuille de style à analyser ni de re-polish) ; changer
+    d'état ne fait que demander un rafraîchissement, et redonner l'état
+    courant ne fait rien.
     """
- 
+
     # Définition des états de la LED
     StateOk = 0
     StateOkBlue = 1
@@ -13,16 +19,24 @@ class PyLedLabel(QLabel):
     StateError = 3
     StateLock = 4
 
-    # Constantes pour la taille et les feuilles de style
+    # Constantes pour la taille et les dégradés (x1, y1, x2, y2, [(position, rgba)...])
     _SIZE = 30
-    _greenSS = f"color: white;border-radius: {_SIZE/2};background-color: qlineargradient(spread:pad, x1:0.145, y1:0.16, x2:1, y2:1, stop:0 rgba(20, 252, 7, 255), stop:1 rgba(25, 134, 5, 255));"
-    _redSS = f"color: white;border-radius: {_SIZE/2};background-color: qlineargradient(spread:pad, x1:0.145, y1:0.16, x2:0.92, y2:0.988636, stop:0 rgba(255, 12, 12, 255), stop:0.869347 rgba(103, 0, 0, 255));"
-    _orangeSS = f"color: white;border-radius: {_SIZE/2};background-color: qlineargradient(spread:pad, x1:0.232, y1:0.272, x2:0.98, y2:0.959773, stop:0 rgba(255, 113, 4, 255), stop:1 rgba(91, 41, 7, 255));"
-    _blueSS = f"color: white;border-radius: {_SIZE/2};background-color: qlineargradient(spread:pad, x1:0.04, y1:0.0565909, x2:0.799, y2:0.795, stop:0 rgba(203, 220, 255, 255), stop:0.41206 rgba(0, 115, 255, 255), stop:1 rgba(0, 49, 109, 255));"
-    _dark_grey_SS = f"color: white;border-radius: {_SIZE/2};background-color: qlineargradient(spread:pad, x1:0.04, y1:0.0565909, x2:0.799, y2:0.795, stop:0 rgba(100, 100, 100, 255), stop:0.41206 rgba(50, 50, 50, 255), stop:1 rgba(20, 20, 20, 255));"
-    
+    _green = (0.145, 0.16, 1, 1, [(0, (20, 252, 7, 255)), (1, (25, 134, 5, 255))])
+    _red = (0.145, 0.16, 0.92, 0.988636, [(0, (255, 12, 12, 255)), (0.869347, (103, 0, 0, 255))])
+    _orange = (0.232, 0.272, 0.98, 0.959773, [(0, (255, 113, 4, 255)), (1, (91, 41, 7, 255))])
+    _blue = (0.04, 0.0565909, 0.799, 0.795,
+             [(0, (203, 220, 255, 255)), (0.41206, (0, 115, 255, 255)), (1, (0, 49, 109, 255))])
+    _dark_grey = (0.04, 0.0565909, 0.799, 0.795,
+                  [(0, (100, 100, 100, 255)), (0.41206, (50, 50, 50, 255)), (1, (20, 20, 20, 255))])
+    _DEGRADES = {StateOk: _green, StateWarning: _orange, StateError: _red, StateOkBlue: _blue, StateLock: _dark_grey}
+
+    # (état, rapport de pixels de l'écran) -> QPixmap, commun à toutes les LEDs
+    _pixmaps = {}
+
     def __init__(self, parent: QWidget = None):
         super().__init__(parent)
+        self._state = None
+        self._pixmap = None
         self.setTextLed()
         self.setFixedSize(self._SIZE, self._SIZE)
         # Définit l'état par défaut sur StateOkBlue
@@ -32,22 +46,32 @@ class PyLedLabel(QLabel):
     def setState(self, state: int):
         """
         Définit l'état de la LED en utilisant les valeurs d'énumération.
+        Renvoie True si l'état a changé.
         """
-        # print(f"setState: {state}")
-        if state == self.StateOk:
-            self.setStyleSheet(self._greenSS)                                                                                                                                                                 
-        elif state == self.StateWarning:                    
-            self.setStyleSheet(self._orangeSS)
-        elif state == self.StateError:      
-            self.setStyleSheet(self._redSS)
-        elif state == self.StateOkBlue:
-            self.setStyleSheet(self._blueSS)
-        elif state == self.StateLock:
-            self.setStyleSheet(self._dark_grey_SS)
-        else:
-            # Gérer les cas inattendus ou définir un état par défaut
-            self.setStyleSheet(self._blueSS)
- 
+        if state == self._state:
+            return False
+        self._state = state
+        # L'image est choisie au dessin (elle dépend de l'écran)
+        self._pixmap = None
+        self.update()
+        return True
+
+    def state(self):
+        return self._state
+
+    @staticmethod
+    def setStates(leds_etats):
+        """
+        Change l'état d'un groupe de LEDs : [(led, état), ...]. Les LEDs déjà
+        dans l'état demandé sont ignorées ; les autres sont redessinées
+        ensemble au prochain passage de la boucle d'événements. Renvoie le
+        nombre de LEDs changées.
+        """
+        changees = 0
+        for led, state in leds_etats:
+            changees += led.setState(state)
+        return changees
+
     @pyqtSlot(bool)
     def setStateBool(self, state: bool):
         """
@@ -55,6 +79,36 @@ class PyLedLabel(QLabel):
         True correspond à StateOk, False à StateError.
         """
         self.setState(self.StateOk if state else self.StateError)
-    
+
     def setTextLed(self):
         self.setText("")
+
+    @classmethod
+    def _image(cls, state, ratio):
+        """Pixmap de l'état (dessiné au premier usage), bleu pour un état inconnu."""
+        cle = (state if state in cls._DEGRADES else cls.StateOkBlue, ratio)
+        pixmap = cls._pixmaps.get(cle)
+        if pixmap is None:
+            x1, y1, x2, y2, arrets = cls._DEGRADES[cle[0]]
+            taille = cls._SIZE
+            pixmap = QPixmap(round(taille * ratio), round(taille * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.transparent)
+            degrade = QLinearGradient(x1 * taille, y1 * taille, x2 * taille, y2 * taille)
+            for position, rgba in arrets:
+                degrade.setColorAt(position, QColor(*rgba))
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(degrade)
+            painter.drawEllipse(QRectF(0, 0, taille, taille))
+            painter.end()
+            cls._pixmaps[cle] = pixmap
+        return pixmap
+
+    def paintEvent(self, event):
+        if self._pixmap is None:
+            self._pixmap = self._image(self._state, self.devicePixelRatioF())
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._pixmap)
+        painter.end()
@@ -1,46 +1,81 @@
-# for documentation and import purpose
-# set __all__ with a list of the submodules
+# -*- coding: utf-8 -*-
+"""
+Compilation des fichiers .ui de Qt Designer en modules Python.
+
+Étape de construction, à lancer après chaque modification d'un .ui (ou à
+l'installation) ; elle n'est plus exécutée au démarrage de l'application,
+qui importe directement les modules générés :
+
+    python compiler.py              # tous les .ui du dossier du programme
+    python compiler.py alimlabo.ui  # seulement ceux-là
+    python compiler.py --force      # recompile même si rien n'a changé
+
+L'empreinte SHA-256 du .ui est écrite en tête du module généré : un .ui
+dont le contenu n'a pas changé n'est pas recompilé, quelle que soit sa date
+de modification (copie, extraction d'archive, checkout...).
+"""
+
+import hashlib
+import io
 import os
+import pathlib
+import sys
+
+MODULE_FOLDER = pathlib.Path(__file__).resolve().parent
+ENTETE_EMPREINTE = "# ui-sha256: "
+
+
+def empreinte(input_ui_file):
+    return hashlib.sha256(pathlib.Path(input_ui_file).read_bytes()).hexdigest()
+
+
+def empreinte_compilee(output_py_file):
+    """Empreinte du .ui écrite dans le module généré, None s'il n'existe pas ou n'en a pas."""
+    try:
+        with open(output_py_file, encoding="utf-8") as f:
+            premiere_ligne = f.readline()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if premiere_ligne.startswith(ENTETE_EMPREINTE):
+        return premiere_ligne[len(ENTETE_EMPREINTE):].strip()
+    return None
+
+
+def compile_if_necessary(input_ui_file, output_py_file=None, force=False):
+    """Compile input_ui_file si son contenu a changé ; renvoie True s'il a été recompilé."""
+    # Import ici : PyQt5.uic n'est chargé que si on compile vraiment
+    from PyQt5.uic import compileUi
+    input_path = pathlib.Path(input_ui_file)
+    output_path = pathlib.Path(output_py_file) if output_py_file else input_path.with_suffix(".py")
+    valeur = empreinte(input_path)
+    if not force and empreinte_compilee(output_path) == valeur:
+        return False
+    code = io.StringIO()
+    # Compilé depuis le dossier du .ui : le module généré ne contient que des chemins relatifs
+    dossier = os.getcwd()
+    os.chdir(input_path.resolve().parent)
+    try:
+        compileUi(input_path.name, code)
+    finally:
+        os.chdir(dossier)
+    # Écrit en une fois : un import concurrent ne voit jamais un module à moitié écrit
+    temporaire = output_path.with_name(output_path.name + ".tmp")
+    temporaire.write_text(ENTETE_EMPREINTE + valeur + "\n" + code.getvalue(), encoding="utf-8")
+    temporaire.replace(output_path)
+    return True
+
+
+def main(arguments=None):
+    arguments = sys.argv[1:] if arguments is None else arguments
+    force = "--force" in arguments
+    fichiers = [pathlib.Path(a) for a in arguments if a != "--force"] or sorted(MODULE_FOLDER.glob("*.ui"))
+    for fichier in fichiers:
+        if compile_if_necessary(fichier, force=force):
+            print(f"{fichier.name} -> {fichier.with_suffix('.py').name}")
+        else:
+            print(f"{fichier.name} : à jour")
+    return 0
+
 
 if __name__ == '__main__':
-    # The program was launched as a script,
-    # so there is nothing to do, because the
-    # current working directory is already set
-    # to the directory of this script
-    module_folder = os.getcwd()
-    print("Module (main) : " ,module_folder)
-else:
-    # The program was launched as a module.
-    # Get the module directory name from __file__
-    # which contains the absolute path of the file
-    # being executed
-    module_folder = __file__[:__file__.rindex(os.sep)]
-    print("Module : " ,module_folder)
-    # module_folder=os.getcwd()
-
-# Make a list of all the Instrument panels in the folder
-from PyQt5.uic import compileUi
-
-
-def compile_if_necessary(input_ui_file, output_py_file):
-    # prepare the file names
-    input_path = module_folder+input_ui_file
-    output_path = module_folder+output_py_file
-    # recompile the .ui Qt file if this script is launched directly
-    # or if the compiled .py GUI file does not exist
-    # or if it is more recent than the compiled .py GUI file,
-    # if __name__=='__main__' or not(os.path.isfile(output_path))
-    # or os.path.getmtime(input_path)>os.path.getmtime(output_path):
-    if not(os.path.isfile(output_path)) or os.path.getmtime(input_path) > os.path.getmtime(output_path):
-        print("update detected: recompiling "+input_ui_file)
-        f = open(output_path, "w")
-        compileUi(input_path, f)
-        f.close()
-
-
-for path, dirs, files in os.walk(module_folder):
-    for fname in files:
-        if fname.endswith(".ui"):
-            print(fname)
-            compile_if_necessary(path[len(module_folder):]+os.sep+fname,
-                                 path[len(module_folder):]+os.sep+fname[:-3]+'.py')
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Canal des consignes (VSET1 / ISET1) du worker.
+
+Quand on maintient une flèche d'un QDoubleSpinBox ou qu'on tourne la molette,
+des dizaines de valeurs arrivent en rafale. Seule la dernière valeur en
+attente de chaque paramètre est gardée, une écriture au plus part par
+intervalle de sécurité, et les valeurs déjà appliquées ne sont pas renvoyées.
+La dernière valeur demandée finit toujours par être envoyée.
+"""
+
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSlot
+
+
+class SetpointChannel(QObject):
+    """
+    envoyer(parametre, valeur, rappel) doit mettre l'écriture en file et
+    appeler rappel(ok) une fois l'écriture faite (ok=False en cas d'échec).
+    """
+
+    INTERVALLE_MS = 150
+
+    def __init__(self, envoyer, intervalle_ms=INTERVALLE_MS, parent=None):
+        super().__init__(parent)
+        self._envoyer = envoyer
+        self._intervalle = intervalle_ms / 1000.0
+        self._attente = {}      # parametre -> dernière valeur demandée, dans l'ordre d'arrivée
+        self._appliquees = {}   # parametre -> dernière valeur envoyée ou acquittée
+        self._derniere_ecriture = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timer)
+
+    def definir(self, parametre, valeur):
+        """Demande une nouvelle consigne ; remplace une éventuelle valeur encore en attente."""
+        self._attente.pop(parametre, None)
+        if self._appliquees.get(parametre) == valeur:
+            return
+        self._attente[parametre] = valeur
+        self._programmer()
+
+    def oublier(self):
+        """Oublie les valeurs appliquées (port rouvert, remise à zéro...) et les attentes."""
+        self._timer.stop()
+        self._attente.clear()
+        self._appliquees.clear()
+
+    def _programmer(self):
+        if self._attente and not self._timer.isActive():
+            attente = self._intervalle - (time.monotonic() - self._derniere_ecriture)
+            self._timer.start(max(int(attente * 1000), 0))
+
+    @pyqtSlot()
+    def _on_timer(self):
+        if not self._attente:
+            return
+        # Une seule écriture par intervalle, la plus ancienne demande d'abord
+        parametre = next(iter(self._attente))
+        valeur = self._attente.pop(parametre)
+        self._appliquees[parametre] = valeur
+        self._derniere_ecriture = time.monotonic()
+        self._envoyer(parametre, valeur, lambda ok: self._on_ecrite(parametre, valeur, ok))
+        self._programmer()
+
+    def _on_ecrite(self, parametre, valeur, ok):
+        if not ok and self._appliquees.get(parametre) == valeur:
+            # Écriture perdue : la valeur n'est pas appliquée
+            del self._appliquees[parametre]
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Couche de tracé en direct pour le PlotWidget de la fenêtre principale.
+
+Chaque canal (tension, courant, ...) correspond à une seule courbe créée une
+fois pour toutes ; à chaque nouvel échantillon on ne fait que mettre à jour ses
+données au lieu d'ajouter un nouvel objet au graphique.
+
+Pour les longues acquisitions, seules les données de la plage visible sont
+envoyées aux courbes, réduites par décimation min/max à environ un couple de
+points par pixel : les pics restent visibles et le coût d'un rafraîchissement
+reste borné quelle que soit la durée de la mesure.
+"""
+
+import numpy as np
+
+import profilage
+
+
+def decimer_minmax(x, y, nb_intervalles):
+    """
+    Réduit (x, y) à environ 2*nb_intervalles points.
+
+    Les points sont regroupés en intervalles consécutifs ; pour chacun on garde
+    le minimum et le maximum de y (dans l'ordre chronologique), ce qui conserve
+    l'enveloppe du signal et donc les pics.
+    """
+    n = len(x)
+    nb_intervalles = max(int(nb_intervalles), 1)
+    if n <= 2 * nb_intervalles:
+        return x, y
+    taille = n // nb_intervalles
+    m = nb_intervalles * taille
+    blocs = y[:m].reshape(nb_intervalles, taille)
+    imin = np.argmin(blocs, axis=1)
+    imax = np.argmax(blocs, axis=1)
+    base = np.arange(nb_intervalles) * taille
+    index = np.empty(2 * nb_intervalles + (n - m), dtype=np.intp)
+    index[0:2 * nb_intervalles:2] = base + np.minimum(imin, imax)
+    index[1:2 * nb_intervalles:2] = base + np.maximum(imin, imax)
+    index[2 * nb_intervalles:] = np.arange(m, n)
+    return x[index], y[index]
+
+
+class LivePlot:
+    """
+    Gère des courbes persistantes alimentées par un MeasurementStore.
+    Chaque canal est associé à une colonne du stockage, l'axe x étant la
+    colonne "temps".
+
+    vider() efface le graphique sans toucher au stockage : seuls les
+    échantillons ajoutés ensuite sont tracés.
+
+    Quand plusieurs alimentations partagent le stockage, un canal peut ne
+    tracer que les lignes d'une alimentation (colonne COLONNE_INSTRUMENT).
+
+    En mode décimé (par défaut), les données sont coupées à la plage x
+    visible quand l'utilisateur a zoomé/déplacé la vue, puis décimées à la
+    largeur en pixels du graphique. Les symboles des points sont masqués
+    au-delà de SEUIL_SYMBOLES points visibles.
+    """
+
+    SEUIL_SYMBOLES = 500
+    COLONNE_INSTRUMENT = "instrument"
+
+    def __init__(self, plot_widget, mesures, decimation=True):
+        self._widget = plot_widget
+        self._vue = plot_widget.getViewBox()
+        self._mesures = mesures
+        self._courbes = {}  # canal -> PlotDataItem
+        self._symboles = {}  # canal -> symboles affichés ou non
+        self._filtres = {}  # canal -> (colonne, numéro d'alimentation ou None)
+        self._origine = 0  # index absolu (mesures.total) du premier échantillon tracé
+        self._en_cours = False
+        self.decimation = decimation
+        self._vue.sigXRangeChanged.connect(self._on_plage_changee)
+
+    def ajouter_canal(self, colonne, couleur, instrument=None):
+        """
+        Crée la courbe d'un canal (une seule fois). Le canal est nommé par sa
+        colonne, ou par (colonne, instrument) s'il est limité à une alimentation.
+        """
+        canal = colonne if instrument is None else (colonne, instrument)
+        if canal not in self._courbes:
+            self._courbes[canal] = self._widget.plot([], [], symbolBrush=couleur)
+            self._symboles[canal] = True
+            self._filtres[canal] = (colonne, instrument)
+        return self._courbes[canal]
+
+    def retirer_canal(self, canal):
+        courbe = self._courbes.pop(canal, None)
+        self._symboles.pop(canal, None)
+        self._filtres.pop(canal, None)
+        if courbe is not None:
+            self._widget.removeItem(courbe)
+
+    def canaux(self):
+        return tuple(self._courbes)
+
+    @profilage.mesurer
+    def rafraichir(self):
+        """Met à jour en place toutes les courbes à partir du stockage."""
+        if self._en_cours:
+            return
+        self._en_cours = True
+        try:
+            debut, fin = self._tranche()
+            temps = self._mesures.colonne("temps")[debut:fin]
+            symboles = len(temps) <= self.SEUIL_SYMBOLES
+            largeur = max(int(self._vue.width()), 100)
+            for canal, courbe in self._courbes.items():
+                x, y = self._serie(canal, temps, debut, fin)
+                if self.decimation:
+                    x, y = decimer_minmax(x, y, largeur)
+                if symboles != self._symboles[canal]:
+                    courbe.setSymbol('o' if symboles else None)
+                    self._symboles[canal] = symboles
+                courbe.setData(x, y, skipFiniteCheck=True)
+        finally:
+            self._en_cours = False
+
+    def donnees(self, nb_points=None):
+        """
+        Copie de ce qui est tracé, pour l'exportation : liste de
+        (courbe, x, y) réduite par décimation min/max à environ nb_points
+        points par courbe (None = sans décimation).
+        """
+        debut, fin = self._tranche()
+        temps = self._mesures.colonne("temps")[debut:fin]
+        resultat = []
+        for canal, courbe in self._courbes.items():
+            x, y = self._serie(canal, temps, debut, fin)
+            if nb_points is not None:
+                x, y = decimer_minmax(x, y, nb_points // 2)
+            resultat.append((courbe, np.array(x), np.array(y)))
+        return resultat
+
+    def _serie(self, canal, temps, debut, fin):
+        """(x, y) du canal sur [debut, fin), limités à son alimentation s'il y a lieu."""
+        colonne, instrument = self._filtres[canal]
+        y = self._mesures.colonne(colonne)[debut:fin]
+        if instrument is None:
+            return temps, y
+        garde = self._mesures.colonne(self.COLONNE_INSTRUMENT)[debut:fin] == instrument
+        return temps[garde], y[garde]
+
+    def _tranche(self):
+        """Indices [debut, fin) du stockage à tracer (origine et plage visible)."""
+        mesures = self._mesures
+        if mesures.total < self._origine:
+            # Le stockage a été vidé entre temps
+            self._origine = 0
+        premier = mesures.total - len(mesures)
+        decalage = max(self._origine - premier, 0)
+        debut, fin = self._plage_visible(mesures.colonne("temps")[decalage:])
+        return debut + decalage, fin + decalage
+
+    def _plage_visible(self, temps):
+        """Indices [debut, fin) des échantillons à tracer."""
+        n = len(temps)
+        if not self.decimation or n == 0 or self._vue.autoRangeEnabled()[0]:
+            return 0, n
+        xmin, xmax = self._vue.viewRange()[0]
+        # Un point de part et d'autre pour que la courbe touche les bords
+        debut = max(int(np.searchsorted(temps, xmin)) - 1, 0)
+        fin = min(int(np.searchsorted(temps, xmax, side="right")) + 1, n)
+        return debut, fin
+
+    def _on_plage_changee(self, *args):
+        # Zoom ou déplacement manuel : on recalcule ce qui est visible
+        if not self._vue.autoRangeEnabled()[0]:
+            self.rafraichir()
+
+    def vider(self):
+        """Efface les courbes sans les supprimer du graphique ni vider le stockage."""
+        self._origine = self._mesures.total
+        for courbe in self._courbes.values():
+            courbe.setData([], [])
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Panneau de diagnostic : compteurs et latences des workers.
+
+Reçoit les instantanés de WorkerMetrics (environ une fois par seconde et par
+alimentation) ; les tableaux ne sont remplis que lorsque le panneau est
+visible. L'écriture périodique dans un fichier au format texte de
+Prometheus peut être activée depuis le panneau.
+"""
+
+import pathlib
+
+from PyQt5.QtCore import Qt, pyqtSlot
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QCheckBox, QLineEdit, QPushButton, QFileDialog)
+
+from metriques import MetricsExporter, quantile
+
+
+# (clé de l'instantané, titre de colonne, format)
+COLONNES_COMPTEURS = (
+    ("cadence", "Éch/s", "{:.1f}"),
+    ("echantillons", "Échantillons", "{}"),
+    ("timeouts", "Timeouts", "{}"),
+    ("timeouts_minute", "Timeouts/min", "{:.1f}"),
+    ("erreurs_decodage", "Décodage", "{}"),
+    ("erreurs_trame", "Trames", "{}"),
+    ("erreurs_ecriture", "Écriture", "{}"),
+    ("echeances_manquees", "Échéances manquées", "{}"),
+    ("octets_recus", "Octets reçus", "{}"),
+    ("octets_envoyes", "Octets envoyés", "{}"),
+)
+COLONNES_LATENCES = ("Alim", "Commande", "Requêtes", "p50 (ms)", "p90 (ms)", "p99 (ms)", "max (ms)")
+
+
+class DiagnosticsPanel(QWidget):
+    """Fenêtre indépendante ; mettre_a_jour(numéro, instantané) à brancher sur les workers."""
+
+    def __init__(self, chemin_fichier, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Diagnostic de la communication")
+        self._instantanes = {}     # numéro -> dernier instantané
+        self._timeouts_minute = {}  # numéro -> timeouts par minute sur le dernier intervalle
+        self._exportateur = None
+
+        self.compteurs = QTableWidget(0, len(COLONNES_COMPTEURS))
+        self.compteurs.setHorizontalHeaderLabels([titre for _, titre, _ in COLONNES_COMPTEURS])
+        self.compteurs.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.compteurs.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.latences = QTableWidget(0, len(COLONNES_LATENCES))
+        self.latences.setHorizontalHeaderLabels(COLONNES_LATENCES)
+        self.latences.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.latences.verticalHeader().hide()
+        self.latences.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+
+        self.caseFichier = QCheckBox("Écrire les métriques dans")
+        self.cheminFichier = QLineEdit(str(chemin_fichier))
+        self.btnFichier = QPushButton("...")
+        self.caseFichier.toggled.connect(self.activer_fichier)
+        self.btnFichier.clicked.connect(self._choisir_fichier)
+        ligne_fichier = QHBoxLayout()
+        ligne_fichier.addWidget(self.caseFichier)
+        ligne_fichier.addWidget(self.cheminFichier, 1)
+        ligne_fichier.addWidget(self.btnFichier)
+
+        disposition = QVBoxLayout(self)
+        disposition.addWidget(QLabel("Compteurs par alimentation"))
+        disposition.addWidget(self.compteurs)
+        disposition.addWidget(QLabel("Latence des requêtes (estimée sur l'histogramme)"))
+        disposition.addWidget(self.latences, 1)
+        disposition.addLayout(ligne_fichier)
+        self.resize(900, 450)
+
+    @pyqtSlot(int, object)
+    def mettre_a_jour(self, numero, instantane):
+        precedent = self._instantanes.get(numero)
+        if precedent is not None and instantane["instant"] > precedent["instant"]:
+            self._timeouts_minute[numero] = ((instantane["timeouts"] - precedent["timeouts"]) * 60.0
+                                             / (instantane["instant"] - precedent["instant"]))
+        self._instantanes[numero] = instantane
+        if self._exportateur is not None:
+            try:
+                self._exportateur.mettre_a_jour(numero, instantane)
+            except OSError as e:
+                self.caseFichier.setChecked(False)
+                self.caseFichier.setToolTip(f"Écriture impossible : {e}")
+        if self.isVisible():
+            self.rafraichir()
+
+    @pyqtSlot(bool)
+    def activer_fichier(self, actif):
+        self.cheminFichier.setEnabled(not actif)
+        self.btnFichier.setEnabled(not actif)
+        if not actif:
+            self._exportateur = None
+            return
+        self.caseFichier.setToolTip("")
+        self._exportateur = MetricsExporter(pathlib.Path(self.cheminFichier.text()), self._instantanes)
+
+    def showEvent(self, event):
+        self.rafraichir()
+        super().showEvent(event)
+
+    def rafraichir(self):
+        numeros = sorted(self._instantanes)
+        self.compteurs.setRowCount(len(numeros))
+        self.compteurs.setVerticalHeaderLabels([f"Alim {numero}" for numero in numeros])
+        lignes_latence = []
+        for ligne, numero in enumerate(numeros):
+            instantane = dict(self._instantanes[numero], timeouts_minute=self._timeouts_minute.get(numero, 0.0))
+            for colonne, (cle, _, format_) in enumerate(COLONNES_COMPTEURS):
+                self._cellule(self.compteurs, ligne, colonne, format_.format(instantane[cle]))
+            for commande, histogramme in sorted(instantane["latences"].items()):
+                lignes_latence.append([str(numero), commande, str(histogramme["nombre"])]
+                                      + [f"{quantile(histogramme, q) * 1000:.3f}" for q in (0.5, 0.9, 0.99)]
+                                      + [f"{histogramme['maximum'] * 1000:.3f}"])
+        self.latences.setRowCount(len(lignes_latence))
+        for ligne, valeurs in enumerate(lignes_latence):
+            for colonne, texte in enumerate(valeurs):
+                self._cellule(self.latences, ligne, colonne, texte)
+
+    @staticmethod
+    def _cellule(table, ligne, colonne, texte):
+        item = table.item(ligne, colonne)
+        if item is None:
+            item = QTableWidgetItem()
+            item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            table.setItem(ligne, colonne, item)
+        item.setText(texte)
+
+    def _choisir_fichier(self):
+        chemin, _ = QFileDialog.getSaveFileName(self, "Fichier des métriques", self.cheminFichier.text(),
+                                                "Métriques Prometheus (*.prom);;Tous les fichiers (*)")
+        if chemin:
+            self.cheminFichier.setText(chemin)
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+Émulateur de l'alimentation RS-3005P sur un pseudo-terminal (Linux).
+
+Ouvre un pty et y répond comme l'appareil, au format des vraies réponses :
+*IDN?, VOUT1?, IOUT1?, VSET1?, ISET1?, STATUS? (un octet binaire), et les
+commandes VSET1:, ISET1:, OUT, OCP, LOCK et BEEP. Le port affiché (ou le
+lien créé avec --lien) s'ouvre dans l'interface ou dans
+acquisition_sans_ihm.py comme un vrai port série : tout le chemin d'E/S du
+SerialWorker est utilisé, contrairement au mode simulation.
+
+La sortie alimente une charge résistive (--charge) : l'appareil est en
+tension constante tant que VSET/R reste sous ISET, en courant constant
+au-delà (et coupe la sortie si l'OCP est actif).
+
+Pour mesurer le worker sans matériel, on peut ajouter :
+  - un temps de réponse de l'appareil (--latence, --gigue) ;
+  - le débit de la liaison (--baud) : les octets sortent au rythme de la
+    ligne série, et une commande n'est traitée qu'une fois « transmise » ;
+  - des réponses fragmentées (--fragmentation) ;
+  - des erreurs (--perte, --corruption, --parasite).
+
+    python emulateur_rs3005p.py --lien /tmp/ttyRS3005P --latence 0.005 --baud 9600
+"""
+
+import argparse
+import os
+import random
+import select
+import signal
+import sys
+import threading
+import time
+import tty
+
+# Octet STATUS? (voie 2 absente, toujours rapportée en C.V)
+from statut import BIT_CV1, BIT_CV2, BIT_BIP, BIT_OCP, BIT_SORTIE, BIT_OVP
+
+
+IDN = "RS-3005P V2.0 SN:00000001"
+TENSION_MAX = 30.0
+COURANT_MAX = 5.0
+# Une commande sans terminateur est considérée complète après ce silence (s)
+SILENCE_FIN_COMMANDE = 0.05
+# Bits par octet sur la ligne : start + 8 données + stop
+BITS_PAR_OCTET = 10
+
+
+class EtatAlimentation:
+    """État de l'appareil et réponses aux commandes, sans aucune E/S."""
+
+    def __init__(self, charge=10.0, bruit=0.0, generateur=None):
+        self.charge = charge          # résistance branchée sur la sortie (ohms)
+        self.bruit = bruit            # bruit de mesure (fraction de la dernière unité affichée)
+        self.tension_consigne = 0.0
+        self.courant_consigne = 0.0
+        self.sortie = False
+        self.ocp = False
+        self.ovp = False
+        self.verrou = False
+        self.bip = True
+        self._hasard = generateur or random.Random()
+
+    def mesures(self):
+        """Renvoie (tension, courant, tension constante) en sortie."""
+        if not self.sortie:
+            return 0.0, 0.0, False
+        if self.charge <= 0 or self.tension_consigne / self.charge > self.courant_consigne:
+            # Courant constant (court-circuit ou charge trop faible)
+            courant = self.courant_consigne
+            return (courant * self.charge if self.charge > 0 else 0.0), courant, False
+        return self.tension_consigne, self.tension_consigne / self.charge, True
+
+    def statut(self):
+        tension_constante = self.mesures()[2]
+        octet = BIT_CV2
+        if tension_constante:
+            octet |= BIT_CV1
+        if self.bip:
+            octet |= BIT_BIP
+        if self.ocp:
+            octet |= BIT_OCP
+        if self.sortie:
+            octet |= BIT_SORTIE
+        if self.ovp:
+            octet |= BIT_OVP
+        return octet
+
+    def traiter(self, commande):
+        """
+        Applique une commande ; renvoie la réponse (bytes), None si la
+        commande n'a pas de réponse. Lève ValueError si elle est inconnue.
+        """
+        commande = commande.strip().upper()
+        if commande == "*IDN?":
+            return IDN.encode("ascii")
+        if commande == "VOUT1?":
+            return self._tension(self._bruite(self.mesures()[0], 0.01))
+        if commande == "IOUT1?":
+            return self._courant(self._bruite(self.mesures()[1], 0.001))
+        if commande == "VSET1?":
+            return self._tension(self.tension_consigne)
+        if commande == "ISET1?":
+            return self._courant(self.courant_consigne)
+        if commande == "STATUS?":
+            return bytes([self.statut()])
+        if commande.startswith("VSET1:"):
+            self.tension_consigne = min(max(float(commande[6:]), 0.0), TENSION_MAX)
+        elif commande.startswith("ISET1:"):
+            self.courant_consigne = min(max(float(commande[6:]), 0.0), COURANT_MAX)
+        elif commande in ("OUT0", "OUT1"):
+            self.sortie = commande == "OUT1"
+        elif commande in ("OCP0", "OCP1"):
+            self.ocp = commande == "OCP1"
+        elif commande in ("LOCK0", "LOCK1"):
+            self.verrou = commande == "LOCK1"
+        elif commande in ("BEEP0", "BEEP1"):
+            self.bip = commande == "BEEP1"
+        else:
+            raise ValueError(f"commande inconnue : {commande!r}")
+        if self.ocp and self.sortie and not self.mesures()[2]:
+            # Protection en courant : passage en C.C -> la sortie est coupée
+            self.sortie = False
+        return None
+
+    def _bruite(self, valeur, resolution):
+        if not self.bruit or valeur == 0.0:
+            return valeur
+        return max(valeur + self._hasard.uniform(-self.bruit, self.bruit) * resolution, 0.0)
+
+    @staticmethod
+    def _tension(valeur):
+        return b"%05.2f" % valeur      # "12.50", "05.00"
+
+    @staticmethod
+    def _courant(valeur):
+        return b"%05.3f" % valeur      # "0.800"
+
+
+class Emulateur:
+    """
+    Fait tourner un EtatAlimentation derrière un pty, dans un thread.
+    Les probabilités (fragmentation, perte, corruption, parasite) sont
+    tirées à chaque réponse ; graine rend les tirages reproductibles.
+    """
+
+    def __init__(self, etat=None, latence=0.0, gigue=0.0, baud=None, fragmentation=0.0,
+                 perte=0.0, corruption=0.0, parasite=0.0, graine=None):
+        self._hasard = random.Random(graine)
+        self.etat = etat if etat is not None else EtatAlimentation(generateur=self._hasard)
+        self.latence = latence
+        self.gigue = gigue
+        self.baud = baud
+        self.fragmentation = fragmentation
+        self.perte = perte
+        self.corruption = corruption
+        self.parasite = parasite
+        self.statistiques = dict.fromkeys(("commandes", "reponses", "inconnues", "fragmentees",
+                                           "perdues", "corrompues", "parasites"), 0)
+        self.port = None
+        self._maitre = None
+        self._esclave = None
+        self._thread = None
+        self._arret = threading.Event()
+
+    @property
+    def duree_octet(self):
+        return BITS_PAR_OCTET / self.baud if self.baud else 0.0
+
+    def demarrer(self):
+        """Ouvre le pty et lance le thread ; renvoie le nom du port à ouvrir."""
+        import pty
+        self._maitre, self._esclave = pty.openpty()
+        # Mode brut : pas d'écho ni de conversion de fin de ligne, les octets passent tels quels
+        tty.setraw(self._esclave)
+        tty.setraw(self._maitre)
+        self.port = os.ttyname(self._esclave)
+        self._arret.clear()
+        self._thread = threading.Thread(target=self._boucle, name="emulateur_rs3005p", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def arreter(self):
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        # Le côté esclave reste ouvert jusqu'ici : le port survit aux fermetures du client
+        for fd in (self._maitre, self._esclave):
+            if fd is not None:
+                os.close(fd)
+        self._maitre = self._esclave = None
+
+    def _boucle(self):
+        tampon = bytearray()
+        dernier_octet = 0.0
+        while not self._arret.is_set():
+            lisibles, _, _ = select.select([self._maitre], [], [], 0.01)
+            if lisibles:
+                try:
+                    tampon += os.read(self._maitre, 1024)
+                except OSError:
+                    # Aucun client ouvert sur le port : on attend le suivant
+                    time.sleep(0.01)
+                    continue
+                dernier_octet = time.perf_counter()
+            while True:
+                fin = min((i for i in (tampon.find(b"\n"), tampon.find(b"\r")) if i >= 0), default=-1)
+                if fin < 0:
+                    break
+                commande = bytes(tampon[:fin])
+                del tampon[:fin + 1]
+                if commande:
+                    self._executer(commande)
+            # L'appareil n'exige pas de terminateur : une commande est finie par un silence
+            if tampon and time.perf_counter() - dernier_octet >= SILENCE_FIN_COMMANDE:
+                commande = bytes(tampon)
+                tampon.clear()
+                self._executer(commande)
+
+    def _executer(self, commande):
+        self.statistiques["commandes"] += 1
+        try:
+            reponse = self.etat.traiter(commande.decode("ascii", "replace"))
+        except ValueError:
+            self.statistiques["inconnues"] += 1
+            return
+        if reponse is None:
+            return
+        # Temps de transmission de la commande (+ terminateur) puis temps de réponse de l'appareil
+        attente = (len(commande) + 1) * self.duree_octet + self.latence
+        if self.gigue:
+            attente += self._hasard.uniform(0.0, self.gigue)
+        if attente > 0:
+            time.sleep(attente)
+        if self._tirage(self.perte):
+            self.statistiques["perdues"] += 1
+            return
+        if self._tirage(self.corruption):
+            self.statistiques["corrompues"] += 1
+            reponse = bytearray(reponse)
+            reponse[self._hasard.randrange(len(reponse))] ^= 1 << self._hasard.randrange(8)
+            reponse = bytes(reponse)
+        if self._tirage(self.parasite):
+            self.statistiques["parasites"] += 1
+            reponse += bytes([self._hasard.randrange(256)])
+        self.statistiques["reponses"] += 1
+        if len(reponse) > 1 and self._tirage(self.fragmentation):
+            self.statistiques["fragmentees"] += 1
+            coupure = self._hasard.randrange(1, len(reponse))
+            self._envoyer(reponse[:coupure])
+            time.sleep(self._hasard.uniform(0.001, 0.01))
+            self._envoyer(reponse[coupure:])
+        else:
+            self._envoyer(reponse)
+
+    def _envoyer(self, octets):
+        """Écrit les octets, au rythme de la ligne série si un débit est donné."""
+        duree = self.duree_octet
+        try:
+            if not duree:
+                os.write(self._maitre, octets)
+                return
+            debut = time.perf_counter()
+            for k in range(len(octets)):
+                reste = debut + (k + 1) * duree - time.perf_counter()
+                if reste > 0:
+                    time.sleep(reste)
+                os.write(self._maitre, octets[k:k + 1])
+        except OSError:
+            pass
+
+    def _tirage(self, probabilite):
+        return probabilite > 0 and self._hasard.random() < probabilite
+
+
+def analyser_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Émulateur RS-3005P sur un pseudo-terminal")
+    parser.add_argument("--lien", default=None, help="crée ce lien symbolique vers le port (ex. /tmp/ttyRS3005P)")
+    parser.add_argument("--charge", type=float, default=10.0, help="résistance de la charge (ohms)")
+    parser.add_argument("--bruit", type=float, default=2.0, help="bruit des mesures (en dernières unités affichées)")
+    parser.add_argument("--latence", type=float, default=0.0, help="temps de réponse de l'appareil (s)")
+    parser.add_argument("--gigue", type=float, default=0.0, help="variation aléatoire ajoutée à la latence (s)")
+    parser.add_argument("--baud", type=int, default=None, help="débit simulé de la ligne (bauds), sans limite par défaut")
+    parser.add_argument("--fragmentation", type=float, default=0.0, help="probabilité de couper une réponse en deux")
+    parser.add_argument("--perte", type=float, default=0.0, help="probabilité de ne pas répondre")
+    parser.add_argument("--corruption", type=float, default=0.0, help="probabilité d'inverser un bit de la réponse")
+    parser.add_argument("--parasite", type=float, default=0.0, help="probabilité d'ajouter un octet après la réponse")
+    parser.add_argument("--graine", type=int, default=None, help="graine des tirages aléatoires")
+    parser.add_argument("--duree", type=float, default=0, help="durée de fonctionnement (s), 0 = jusqu'à Ctrl+C")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    options = analyser_arguments(arguments)
+    emulateur = Emulateur(latence=options.latence, gigue=options.gigue, baud=options.baud,
+                          fragmentation=options.fragmentation, perte=options.perte,
+                          corruption=options.corruption, parasite=options.parasite, graine=options.graine)
+    emulateur.etat.charge = options.charge
+    emulateur.etat.bruit = options.bruit
+    port = emulateur.demarrer()
+    if options.lien:
+        if os.path.islink(options.lien):
+            os.remove(options.lien)
+        os.symlink(port, options.lien)
+    print(options.lien or port, flush=True)
+
+    fin = threading.Event()
+    signal.signal(signal.SIGINT, lambda *args: fin.set())
+    signal.signal(signal.SIGTERM, lambda *args: fin.set())
+    fin.wait(options.duree if options.duree > 0 else None)
+
+    emulateur.arreter()
+    if options.lien and os.path.islink(options.lien):
+        os.remove(options.lien)
+    print(", ".join(f"{nom}: {nombre}" for nom, nombre in emulateur.statistiques.items()), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
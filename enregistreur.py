@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Enregistrement continu des mesures sur disque pendant l'acquisition.
+
+Les échantillons sont regroupés par lots côté interface puis écrits dans un
+fichier de session CSV par un thread dédié. Le fichier est vidé (flush) ou
+synchronisé sur le disque (fsync) à intervalle régulier selon la politique
+choisie : un plantage ne fait perdre que les dernières secondes de mesure.
+
+Les valeurs sont écrites par le formateur des exportations texte
+(exportation.formater_lignes) : le fichier de session et un export CSV ou
+TXT des mesures ont le même contenu.
+"""
+
+import os
+import pathlib
+import time
+
+import numpy as np
+
+from PyQt5.QtCore import QObject, QThread, QTimer, Qt, QMetaObject, pyqtSignal, pyqtSlot
+
+from exportation import formater_lignes, DECIMALES
+
+
+# Politiques de vidage du fichier de session
+VIDAGE_AUCUN = "aucun"    # seulement quand le tampon d'écriture est plein
+VIDAGE_FLUSH = "flush"    # flush périodique vers le système
+VIDAGE_FSYNC = "fsync"    # flush + fsync périodique vers le disque
+
+COLONNES_CSV = ("Temps", "Tension", "Courant")
+
+
+class _SessionWriter(QObject):
+    """Écrit les lots de mesures dans le fichier de session, dans son propre thread."""
+
+    erreur = pyqtSignal(str)
+
+    TAILLE_TAMPON = 1 << 16
+
+    def __init__(self, politique, periode_ms, colonnes, decimales):
+        super().__init__()
+        self._politique = politique
+        self._decimales = decimales
+        self._entete = ",".join(colonnes) + "\n"
+        self._fichier = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(periode_ms)
+        self._timer.timeout.connect(self._on_vidage)
+
+    @pyqtSlot(str)
+    def ouvrir(self, chemin):
+        self.fermer()
+        try:
+            self._fichier = open(chemin, "wb", buffering=self.TAILLE_TAMPON)
+            self._fichier.write(self._entete.encode("ascii"))
+        except OSError as e:
+            self._fichier = None
+            self.erreur.emit(f"Impossible de créer le fichier de session '{chemin}': {e}")
+            return
+        if self._politique != VIDAGE_AUCUN:
+            self._timer.start()
+
+    @pyqtSlot(object)
+    def ecrire(self, lignes):
+        if self._fichier is None:
+            return
+        try:
+            self._fichier.write(formater_lignes(np.array(lignes, dtype=np.float64).T, ",", self._decimales))
+        except OSError as e:
+            self.erreur.emit(f"Erreur d'écriture du fichier de session: {e}")
+
+    @pyqtSlot()
+    def synchroniser(self):
+        """Vide le tampon et force l'écriture sur le disque."""
+        if self._fichier is None:
+            return
+        try:
+            self._fichier.flush()
+            os.fsync(self._fichier.fileno())
+        except OSError as e:
+            self.erreur.emit(f"Erreur de synchronisation du fichier de session: {e}")
+
+    @pyqtSlot()
+    def fermer(self):
+        self._timer.stop()
+        if self._fichier is not None:
+            self.synchroniser()
+            self._fichier.close()
+            self._fichier = None
+
+    @pyqtSlot()
+    def _on_vidage(self):
+        if self._politique == VIDAGE_FSYNC:
+            self.synchroniser()
+        elif self._fichier is not None:
+            self._fichier.flush()
+
+
+class StreamingLogger(QObject):
+    """
+    Façade utilisée depuis le thread de l'interface (ou du programme sans
+    interface). ajouter() met un échantillon dans le lot courant, envoyer()
+    transmet le lot au thread d'écriture. Une session (un fichier) est créée
+    au premier échantillon et close par terminer_session().
+
+    decimales : un nombre pour toutes les colonnes, ou un par colonne.
+    """
+
+    erreur = pyqtSignal(str)
+
+    _ouvrir = pyqtSignal(str)
+    _ecrire = pyqtSignal(object)
+    _fermer = pyqtSignal()
+
+    def __init__(self, dossier, politique=VIDAGE_FLUSH, periode_ms=1000, colonnes=COLONNES_CSV,
+                 decimales=DECIMALES, parent=None):
+        super().__init__(parent)
+        self._dossier = pathlib.Path(dossier)
+        self._lot = []
+        self.chemin = None
+        self._thread = QThread()
+        self._writer = _SessionWriter(politique, periode_ms, colonnes, decimales)
+        self._writer.moveToThread(self._thread)
+        self._writer.erreur.connect(self.erreur)
+        self._ouvrir.connect(self._writer.ouvrir)
+        self._ecrire.connect(self._writer.ecrire)
+        self._fermer.connect(self._writer.fermer)
+        self._thread.start()
+
+    def nouvelle_session(self, chemin=None):
+        """Ferme la session en cours et en ouvre une nouvelle, renvoie le chemin du fichier."""
+        self.terminer_session()
+        if chemin is None:
+            self._dossier.mkdir(parents=True, exist_ok=True)
+            chemin = self._dossier / ("session_" + time.strftime("%Y-%m-%d_%H.%M.%S") + ".csv")
+        self.chemin = pathlib.Path(chemin)
+        self._ouvrir.emit(str(self.chemin))
+        return self.chemin
+
+    def ajouter(self, *valeurs):
+        """Ajoute une ligne (une valeur par colonne du fichier)."""
+        if self.chemin is None:
+            self.nouvelle_session()
+        self._lot.append(valeurs)
+
+    def envoyer(self):
+        """Transmet au thread d'écriture les échantillons accumulés."""
+        if self._lot:
+            self._ecrire.emit(self._lot)
+            self._lot = []
+
+    def synchroniser(self):
+        """Attend que tout ce qui a été ajouté soit écrit sur le disque."""
+        self.envoyer()
+        if self.chemin is not None:
+            self.attendre_ecriture()
+
+    def attendre_ecriture(self):
+        """
+        Attend que les lots déjà envoyés soient écrits sur le disque. Bloquant :
+        à appeler hors du thread de l'interface (tâche d'exportation).
+        """
+        QMetaObject.invokeMethod(self._writer, "synchroniser", Qt.BlockingQueuedConnection)
+
+    def terminer_session(self):
+        if self.chemin is not None:
+            self.envoyer()
+            self._fermer.emit()
+            self.chemin = None
+
+    def arreter(self):
+        """Ferme la session et arrête le thread d'écriture."""
+        self.terminer_session()
+        self._thread.quit()
+        self._thread.wait()
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Exportation des mesures en arrière-plan.
+
+Chaque exportation travaille sur une copie des données prise au moment de la
+demande et tourne dans son propre QThread : l'interface reste réactive, et
+une nouvelle exportation peut être lancée pendant qu'une autre s'écrit.
+
+Le texte (CSV / TXT) est formaté colonne par colonne avec numpy, en virgule
+fixe : les chiffres sont calculés pour toute une colonne à la fois dans une
+matrice d'octets, sans f-string par ligne.
+"""
+
+import os
+
+import numpy as np
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+import fichier_binaire
+
+
+# Nombre de décimales écrites (la résolution de l'alimentation est de 1 mV / 1 mA)
+DECIMALES = 6
+# Lignes formatées par bloc (une étape de progression par bloc)
+TAILLE_BLOC = 1 << 17
+# Taille des morceaux recopiés depuis le fichier de session
+TAILLE_COPIE = 1 << 20
+
+_NUL = 0
+# Au-delà (valeur × 10**décimales), le calcul en entiers int64 déborderait
+LIMITE_ENTIERS = 2.0 ** 62
+
+
+def formater_colonne(valeurs, decimales=DECIMALES):
+    """
+    Renvoie une matrice uint8 (lignes, largeur) contenant le texte de chaque
+    valeur, complété par des octets nuls qui sont retirés après assemblage.
+    Les valeurs non finies sont écrites "nan", "inf" ou "-inf" (relues telles quelles par float).
+    """
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    finies = np.isfinite(valeurs)
+    echelle = 10 ** decimales
+    if finies.any() and np.abs(valeurs[finies]).max() * echelle >= LIMITE_ENTIERS:
+        # Les valeurs à l'échelle ne tiennent pas dans un int64 : formatage par printf (plus lent)
+        texte = np.char.mod(f"%.{decimales}f", valeurs).astype(np.bytes_)
+        return texte.view(np.uint8).reshape(len(valeurs), texte.dtype.itemsize)
+    v = np.rint(np.where(finies, valeurs, 0.0) * echelle).astype(np.int64)
+    negatif = v < 0
+    entier, fraction = np.divmod(np.abs(v), echelle)
+    nb_chiffres = max(len(str(int(entier.max()))) if len(entier) else 1, 3)
+    largeur = 1 + nb_chiffres + (1 + decimales if decimales else 0)
+    texte = np.zeros((len(valeurs), largeur), dtype=np.uint8)
+    # Signe, puis chiffres de la partie entière de droite à gauche (sans zéros de tête)
+    texte[:, 0] = np.where(negatif, ord("-"), _NUL)
+    reste = entier
+    for k in range(nb_chiffres):
+        texte[:, nb_chiffres - k] = np.where((reste > 0) | (k == 0), reste % 10 + ord("0"), _NUL)
+        reste = reste // 10
+    if decimales:
+        texte[:, 1 + nb_chiffres] = ord(".")
+        reste = fraction
+        for k in range(decimales):
+            texte[:, largeur - 1 - k] = reste % 10 + ord("0")
+            reste = reste // 10
+    if not finies.all():
+        for masque, mot in ((np.isnan(valeurs), b"nan"), (valeurs == np.inf, b"inf"), (valeurs == -np.inf, b"-inf")):
+            texte[masque] = np.frombuffer(mot.ljust(largeur, b"\0"), dtype=np.uint8)
+    return texte
+
+
+def formater_lignes(colonnes, separateur=",", decimales=DECIMALES):
+    """
+    Formate un bloc de colonnes (tableau 2D, une colonne par ligne) en lignes
+    de texte. decimales : un nombre pour toutes les colonnes, ou un par colonne.
+    """
+    nb_lignes = colonnes.shape[1]
+    if isinstance(decimales, int):
+        decimales = (decimales,) * len(colonnes)
+    morceaux = []
+    for k, colonne in enumerate(colonnes):
+        morceaux.append(formater_colonne(colonne, decimales[k]))
+        fin = separateur if k < len(colonnes) - 1 else "\n"
+        morceaux.append(np.full((nb_lignes, 1), ord(fin), dtype=np.uint8))
+    return np.hstack(morceaux).tobytes().replace(b"\0", b"")
+
+
+def ecrire_texte(chemin, entetes, donnees, separateur, progression, decimales=DECIMALES):
+    """Écrit le tableau donnees (colonnes x lignes) en texte, bloc par bloc."""
+    nb_lignes = donnees.shape[1]
+    with open(chemin, "wb") as fichier:
+        fichier.write((separateur.join(entetes) + "\n").encode("ascii"))
+        for debut in range(0, nb_lignes, TAILLE_BLOC):
+            fichier.write(formater_lignes(donnees[:, debut:debut + TAILLE_BLOC], separateur, decimales))
+            progression(min(debut + TAILLE_BLOC, nb_lignes) * 100 // nb_lignes)
+
+
+def copier(source, chemin, progression, synchroniser=None):
+    """
+    Recopie source (fichier de session encore ouvert), jusqu'à sa taille une
+    fois synchroniser() revenu : les lignes ajoutées ensuite ne sont pas copiées.
+    """
+    if synchroniser is not None:
+        synchroniser()
+    taille = os.path.getsize(source)
+    with open(source, "rb") as entree, open(chemin, "wb") as sortie:
+        copie = 0
+        while copie < taille:
+            morceau = entree.read(min(TAILLE_COPIE, taille - copie))
+            if not morceau:
+                break
+            sortie.write(morceau)
+            copie += len(morceau)
+            progression(copie * 100 // taille)
+    progression(100)
+
+
+class _ExportWorker(QObject):
+    progression = pyqtSignal(str, int)   # (chemin, pourcentage)
+    termine = pyqtSignal(str, str)       # (chemin, message d'erreur ou "")
+
+    def __init__(self, chemin, tache):
+        super().__init__()
+        self._chemin = chemin
+        self._tache = tache
+
+    @pyqtSlot()
+    def executer(self):
+        erreur = "interrompu"
+        try:
+            self._tache(lambda pourcentage: self.progression.emit(self._chemin, pourcentage))
+            erreur = ""
+        except (OSError, ValueError) as e:
+            erreur = str(e)
+        except Exception as e:
+            # Pas relancée : une exception sortant d'un slot arrête l'application (PyQt5)
+            erreur = f"{type(e).__name__}: {e}"
+        finally:
+            # Toujours émis : sinon le chemin resterait « en cours » dans ExportManager
+            self.termine.emit(self._chemin, erreur)
+
+
+class ExportManager(QObject):
+    """
+    Lance les exportations, chacune dans un QThread, et relaie leur
+    progression. Les données passées doivent être une copie : elles sont
+    lues dans un autre thread pendant que l'acquisition continue.
+    """
+
+    progression = pyqtSignal(str, int)   # (chemin, pourcentage)
+    termine = pyqtSignal(str, str)       # (chemin, message d'erreur ou "")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._taches = {}  # chemin -> (thread, worker)
+
+    @property
+    def en_cours(self):
+        return len(self._taches)
+
+    def exporter_texte(self, chemin, entetes, donnees, separateur=",", decimales=DECIMALES):
+        return self._lancer(chemin, lambda progression: ecrire_texte(chemin, entetes, donnees, separateur,
+                                                                     progression, decimales))
+
+    def exporter_binaire(self, chemin, noms, donnees, metadonnees=None):
+        def tache(progression):
+            fichier_binaire.ecrire(chemin, noms, donnees, metadonnees)
+            progression(100)
+        return self._lancer(chemin, tache)
+
+    def exporter_graphique(self, chemin, instantane, largeur, hauteur):
+        """instantane : rendu_graphique.GraphSnapshot pris dans le thread de l'interface."""
+        def tache(progression):
+            # Import ici : le fichier de session (enregistreur) utilise ce module sans pyqtgraph
+            import rendu_graphique
+            rendu_graphique.exporter(chemin, instantane, largeur, hauteur)
+            progression(100)
+        return self._lancer(chemin, tache)
+
+    def copier(self, source, chemin, synchroniser=None):
+        """synchroniser() est appelé dans le thread de l'exportation, avant la copie."""
+        return self._lancer(chemin, lambda progression: copier(source, chemin, progression, synchroniser))
+
+    def attendre(self):
+        """Attend la fin de toutes les exportations (fermeture de l'application)."""
+        for thread, _ in list(self._taches.values()):
+            thread.quit()
+            thread.wait()
+        self._taches.clear()
+
+    def _lancer(self, chemin, tache):
+        """Démarre la tâche ; renvoie False si ce fichier est déjà en cours d'écriture."""
+        if chemin in self._taches:
+            return False
+        thread = QThread()
+        worker = _ExportWorker(chemin, tache)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.executer)
+        worker.progression.connect(self.progression)
+        worker.termine.connect(self._on_termine)
+        self._taches[chemin] = (thread, worker)
+        thread.start()
+        return True
+
+    @pyqtSlot(str, str)
+    def _on_termine(self, chemin, erreur):
+        thread, _ = self._taches.pop(chemin, (None, None))
+        if thread is not None:
+            thread.quit()
+            thread.wait()
+        self.termine.emit(chemin, erreur)
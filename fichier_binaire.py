@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Format binaire en colonnes pour l'enregistrement des mesures (.rsm).
+
+Disposition du fichier (entiers petit-boutiste) :
+
+    octets 0-7    : signature b"RS3005P\\0"
+    octets 8-11   : version du format (uint32)
+    octets 12-15  : taille T de l'entête JSON, remplissage compris (uint32)
+    octets 16-16+T: entête JSON en UTF-8, complétée par des espaces pour que
+                    les données commencent sur un multiple de 64 octets
+    puis          : les colonnes l'une après l'autre, chacune de "lignes"
+                    float64 petit-boutiste ("<f8")
+
+L'entête JSON contient "colonnes" (noms dans l'ordre du fichier), "lignes",
+"dtype" et "metadonnees" (IDN de l'appareil, consignes, pas de mesure,
+heure de début...). Les colonnes sont relues par np.memmap sans copie.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+
+SIGNATURE = b"RS3005P\x00"
+VERSION = 1
+EXTENSION = ".rsm"
+ALIGNEMENT = 64
+DTYPE = "<f8"
+
+_DEBUT = struct.Struct("<8sII")
+
+
+def ecrire(chemin, noms, colonnes, metadonnees=None):
+    """Écrit les colonnes (séquences de même longueur) avec leurs noms et métadonnées."""
+    colonnes = [np.ascontiguousarray(c, dtype=DTYPE) for c in colonnes]
+    if len(noms) != len(colonnes):
+        raise ValueError("Il faut autant de noms que de colonnes")
+    lignes = len(colonnes[0]) if colonnes else 0
+    if any(len(c) != lignes for c in colonnes):
+        raise ValueError("Les colonnes n'ont pas toutes la même longueur")
+    entete = json.dumps({"colonnes": list(noms), "lignes": lignes, "dtype": DTYPE,
+                         "metadonnees": metadonnees or {}}, ensure_ascii=False).encode("utf-8")
+    # Remplissage pour aligner le début des données
+    entete += b" " * (-(_DEBUT.size + len(entete)) % ALIGNEMENT)
+    with open(chemin, "wb") as fichier:
+        fichier.write(_DEBUT.pack(SIGNATURE, VERSION, len(entete)))
+        fichier.write(entete)
+        for colonne in colonnes:
+            colonne.tofile(fichier)
+
+
+def lire_entete(chemin):
+    """Renvoie (entête JSON décodée, position du début des données)."""
+    with open(chemin, "rb") as fichier:
+        debut = fichier.read(_DEBUT.size)
+        if len(debut) < _DEBUT.size:
+            raise ValueError(f"'{chemin}' n'est pas un fichier {EXTENSION}")
+        signature, version, taille = _DEBUT.unpack(debut)
+        if signature != SIGNATURE:
+            raise ValueError(f"'{chemin}' n'est pas un fichier {EXTENSION}")
+        if version > VERSION:
+            raise ValueError(f"Version {version} du format non prise en charge")
+        entete = json.loads(fichier.read(taille).decode("utf-8"))
+    return entete, _DEBUT.size + taille
+
+
+def lire(chemin, mode="r"):
+    """
+    Renvoie (colonnes, metadonnees) : colonnes est un dict nom -> tableau
+    projeté en mémoire (np.memmap), rien n'est chargé avant d'être lu.
+    """
+    entete, position = lire_entete(chemin)
+    noms = entete["colonnes"]
+    lignes = entete["lignes"]
+    if lignes == 0 or not noms:
+        donnees = np.empty((len(noms), 0), dtype=entete["dtype"])
+    else:
+        donnees = np.memmap(chemin, dtype=entete["dtype"], mode=mode,
+                            offset=position, shape=(len(noms), lignes))
+    return dict(zip(noms, donnees)), entete["metadonnees"]
@@ -15,312 +15,45 @@ With the help of :
 """
 
 import sys
-import compiler
-# Import de la partie graphique dessinée dans designer
-from alimlabo import Ui_MainWindow
+# Import de la partie graphique dessinée dans designer, compilée par « python compiler.py »
+try:
+    from alimlabo import Ui_MainWindow
+except ModuleNotFoundError as e:
+    if e.name != "alimlabo":
+        raise
+    # Module pas encore généré : lecture du .ui au démarrage (plus lent)
+    import os.path
+    from PyQt5 import uic
+    Ui_MainWindow, _ = uic.loadUiType(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alimlabo.ui"))
 from classesecond import PyLedLabel
+from stockage import MeasurementStore
+from courbes import LivePlot
+from modele_tableau import MeasurementTableModel
+from presentation import PresentationScheduler
+from instruments import InstrumentManager
+from journal_console import ConsoleSink, DONNEES, ERREUR, ENVOI
+from enregistreur import StreamingLogger, VIDAGE_FLUSH
+import fichier_binaire
+from exportation import ExportManager, DECIMALES
+import rendu_graphique
+from diagnostic import DiagnosticsPanel
+import statut
+import profilage
 
 # Import des widgets utilisés
-from PyQt5.QtWidgets import (QApplication, QMessageBox, QFileDialog, QTableWidgetItem, QApplication, QMainWindow, QPushButton, 
-QVBoxLayout, QWidget, QTextEdit, QLineEdit, QLabel)
+from PyQt5.QtWidgets import (QApplication, QMessageBox, QFileDialog, QMainWindow, QPushButton, 
+QVBoxLayout, QWidget, QTextEdit, QLineEdit, QLabel, QHeaderView, QSpinBox, QInputDialog)
 # Import des bibliotèques QtCore
-from PyQt5.QtCore import QFileInfo, Qt, QDateTime, QThread, QObject, pyqtSignal, pyqtSlot, QIODevice, QEventLoop, QTimer
+from PyQt5.QtCore import QFileInfo, Qt, QDateTime, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QIcon
-from PyQt5.QtSerialPort import QSerialPort, QSerialPortInfo
+from PyQt5.QtSerialPort import QSerialPortInfo
 
-#Pour enregistrer le graphique mais chepa si jaurais pu faire le tracé des courbes avec ca directemment a voir 
-import pyqtgraph as pg
-import pyqtgraph.exporters
-
-import random
 import pathlib
+import os
 from math import log
 import time
 
 import string
-class SerialWorker(QObject):
-    """
-    Worker pour gérer la communication série dans un thread séparé.
-    Émet des signaux pour communiquer avec l'interface utilisateur.
-    """
-    # Signaux émis par le worker pour l'UI
-    port_status = pyqtSignal(bool, str)     # (succès, message)
-    data_received = pyqtSignal(str)         # Données décodées reçues (générique, pour la console)
-    error_occurred = pyqtSignal(str)        # Messages d'erreur
-
-
-    # Signal interne pour demander l'écriture (appelé par des méthodes publiques)
-    _write_request = pyqtSignal(bytes)
-    # Signal interne pour les requêtes, utilisé par la fonction _query
-    _query_response_received = pyqtSignal(str)
-    signal_simu_received = pyqtSignal(bool)
-    table_mesures_ready = pyqtSignal(list)
-    #signal pour change la valeurs de temps de latence de _query
-    default_query_timeout_updated = pyqtSignal(int)
-    statut = pyqtSignal(str)
-    
-
-    def __init__(self):
-        super().__init__()
-        self._serial_port = QSerialPort()
-        self._serial_port.readyRead.connect(self._read_data)
-        self._write_request.connect(self._write_data)
-        self._is_open = False
-        # Variables pour la fonction _query
-        self._query_data_buffer = ""
-        self._query_waiting_for_response = False
-        self._query_event_loop = None
-        self._query_timeout_timer = QTimer(self)
-        self._query_timeout_timer.setSingleShot(True)
-        self._query_timeout_timer.timeout.connect(self._on_query_timeout)
-        self._default_query_timeout_ms = 1000
-        self._simulation_state = False
-        self.signal_simu_received.connect(self._simulation)
-    
-    @pyqtSlot(str, int)
-    def _open_port(self, port_name, baud_rate):
-        if self._simulation_state:
-            self.port_status.emit(f"Connexion au port simulé.")
-        else:
-            """Ouvre le port série avec les paramètres spécifiés."""
-            if self._serial_port.isOpen():
-                self._serial_port.close()
-    
-            self._serial_port.setPortName(port_name)
-            self._serial_port.setBaudRate(baud_rate)
-            self._serial_port.setDataBits(QSerialPort.Data8)
-            self._serial_port.setParity(QSerialPort.NoParity)
-            self._serial_port.setStopBits(QSerialPort.OneStop)
-            self._serial_port.setFlowControl(QSerialPort.NoFlowControl)
-    
-            if self._serial_port.open(QIODevice.ReadWrite):
-                self._is_open = True
-                self.port_status.emit(True, f"Port '{port_name}' ouvert à {baud_rate} bauds.")
-                self.data_received.emit("Port ouvert !")
-                self._remise_zero()  
-
-            
-            else:
-                self._is_open = False
-                error_msg = self._serial_port.errorString()
-                self.port_status.emit(False, f"Erreur d'ouverture de '{port_name}': {error_msg}")
-                self.data_received.emit("Erreur d'ouverture ")
-                self.error_occurred.emit(error_msg)
-
-    @pyqtSlot()
-    def _close_port(self):
-        """Ferme le port série."""
-        if self._simulation_state:
-            self.port_status.emit(f"Fermeture du port simulé.")
-        if self._serial_port.isOpen():
-            self._remise_zero()
-            self._serial_port.close()
-            self._is_open = False
-            self.port_status.emit(False, "Port série fermé.")
-            self.data_received.emit("Port série fermé.")
-            # Si une requête est en attente, la terminer
-            if self._query_waiting_for_response and self._query_event_loop:
-                self._query_timeout_timer.stop()
-                self._query_event_loop.quit()
-                self._query_waiting_for_response = False
-
-
-    @pyqtSlot(bytes)
-    def _write_data(self, data):
-        """Slot interne pour écrire des octets sur le port série."""
-        if self._is_open:
-            written_bytes = self._serial_port.write(data)
-            if written_bytes == -1:
-                self.error_occurred.emit(f"Erreur d'écriture: {self._serial_port.errorString()}")
-        else:
-            self.error_occurred.emit("Impossible d'écrire: le port n'est pas ouvert.")
-
-
-
-    @pyqtSlot()
-    def _read_data(self):
-        """Slot pour lire les données disponibles quand 'readyRead' est émis."""
-        while self._serial_port.bytesAvailable():
-            data = self._serial_port.readAll().data()
-            try:
-                # Décoder les octets reçus en chaîne (souvent 'ascii' ou 'utf-8')
-                decoded_data = data.decode('ascii').strip()
-
-                if decoded_data :
-                    
-                    self.data_received.emit(decoded_data)
-                
-                    # Si une _query est en attente, capturer cette réponse
-                    if self._query_waiting_for_response and self._query_event_loop:
-                        self._query_data_buffer = decoded_data # Stocke la réponse
-                        self._query_timeout_timer.stop()       # Arrête le timeout
-                        self._query_event_loop.quit()          # Quitte la boucle d'événements
-                        self._query_waiting_for_response = False # Réinitialise l'état
-
-            except UnicodeDecodeError:
-                self.error_occurred.emit(f"Erreur de décodage des données: {data!r}")
-
-             
-    @pyqtSlot()
-    def _on_query_timeout(self):
-        """Appelé si le timeout de la requête est atteint."""
-        self.error_occurred.emit("Timeout lors de l'attente de la réponse à la requête.")
-        if self._query_event_loop:
-            self._query_event_loop.quit() # Quitte la boucle d'événements
-        self._query_waiting_for_response = False
-        self._query_data_buffer = "" # Efface le buffer en cas de timeout
-
-
-    @pyqtSlot(int)
-    def _set_default_query_timeout(self, new_timeout_ms):
-        if new_timeout_ms > 0: # S'assurer que le timeout est positif
-            self._default_query_timeout_ms = new_timeout_ms
-            self.data_received.emit(f"Timeout des requêtes défini à {new_timeout_ms} ms.")
-            self.default_query_timeout_updated.emit(new_timeout_ms) 
-        else:
-            self.error_occurred.emit("Le timeout des requêtes doit être une valeur positive.")
-        # PAS DE RETURN ICI ! Un pyqtSlot ne doit généralement pas retourner de valeur
-    
-    
-    @pyqtSlot(str, int, result=str)
-    def _query(self, command_string, timeout_ms = -1): 
-        if not self._is_open:
-            self.error_occurred.emit("Impossible d'effectuer la requête: le port n'est pas ouvert.")
-            return ""
-
-        if self._query_waiting_for_response:
-            self.error_occurred.emit("Une autre requête est déjà en attente de réponse. Veuillez patienter.")
-            return "" # Évite d'empiler les requêtes
-        
-        actual_timeout = self._default_query_timeout_ms
-        if timeout_ms != -1: # Si un timeout spécifique est fourni, on l'utilise à la place
-            actual_timeout = timeout_ms
-            
-        self._query_waiting_for_response = True
-        self._query_data_buffer = "" # Réinitialise le buffer pour la nouvelle requête
-        # Envoie la commande
-        self._write_request.emit((command_string + "\n").encode('ascii'))
-        # Crée et exécute une boucle d'événements pour attendre la réponse
-        self._query_event_loop = QEventLoop()  
-        self._query_timeout_timer.start(actual_timeout)   
-        self._query_event_loop.exec_() # Bloque le thread du worker ici
-        # Nettoyage après la fin de la boucle (timeout ou réponse reçue)
-        self._query_event_loop = None # Libère la référence à la boucle
-        self._query_waiting_for_response = False 
-        return self._query_data_buffer # Retourne ce qui a été stocké dans le buffer
-
-
-    def _send_command(self, command_string):
-        """Envoie une commande textuelle sans attendre de réponse immédiate."""
-        self._write_request.emit((command_string + "\n").encode('ascii'))
-
-
-    def _request_idn(self):
-        """Demande l'identification de l'appareil et renvoie la réponse."""
-        return self._query("*IDN?")
-    
-    
-    def _request_status(self):        
-        s = self._query("STATUS?")
-        if (s == "\12" or s== "↕" or s==""):
-            statut = "OCP OFF, C.C OFF, C.V OFF, LOCK ON/OFF, OUT OFF"
-        elif (s == "S"):
-            statut = "OCP OFF, C.C OFF, C.V ON, LOCK ON/OFF, OUT ON"
-        elif (s=="R"):
-            statut ="OCP ON, C.C ON, C.V OFF, LOCK ON/OFF, OUT ON" 
-        elif (s == "2"):
-            statut = "OCP ON, C.C OFF, C.V OFF, LOCK ON/OFF, OUT OFF"
-        elif (s == "s"):
-            statut = "OCP ON, C.C OFF, C.V ON, LOCK ON/OFF, OUT ON"
-        else:
-            statut = "Statut non réferencé ou alors résistance exacte"
-        return statut
-    
-
-    def _status_leds(self):
-        s = self._query("STATUS?")
-        self.statut.emit(s)
-        
-        
-    def _set_voltage(self, voltage):
-        """Définit la tension de sortie de l'alimentation."""
-        self._send_command(f"VSET1:{voltage}")
-
-    
-    def _get_voltage(self):
-        responsev = float(self._query("VOUT1?"))
-        return responsev
-        try:
-            if "VOUT1:" in responsev: 
-                voltage = float(responsev.split("VOUT1:")[-1].strip())
-                return voltage
-            else:
-                self.error_occurred.emit(f"Format de réponse VOUT1 inattendu ou vide: '{responsev}'")
-                return float('nan')
-        except ValueError:
-            self.error_occurred.emit(f"Impossible de parser la tension de: '{responsev}'")
-            return float('nan')
-
-
-    def _set_ampere(self, ampere):
-        self._send_command(f"ISET1:{ampere}")
-
-
-    def _get_ampere(self):
-        #Demande le courant de sortie actuel et renvoie la valeur.
-        responsec = float(self._query('IOUT1?'))
-        return responsec
-        try:
-            if "IOUT1:" in responsec:
-                current = float(responsec.split("IOUT1:")[-1].strip())
-                return current
-            else:
-                self.error_occurred.emit(f"Format de réponse IOUT1 inattendu ou vide: '{responsec}'")
-                return float('nan')
-        except ValueError:
-            self.error_occurred.emit(f"Impossible de parser le courant de: '{responsec}'")
-            return float('nan')
-
-
-    def _set_output(self, state):
-        """Active (1) ou désactive (0) la sortie de l'alimentation."""
-        self._send_command(f"OUT{int(state)}")
-        
-        
-    def _set_ocp(self, state):
-        # si ocp acitf = 1 ou inactif = 0
-        self._send_command(f"OCP{int(state)}")
-        
-        
-    def _simulation(self, state):
-        self._simulation_state = state
-        self.data_received.emit("Etat simulation :{}".format(state)) 
-
-        
-    @pyqtSlot()
-    def _read_mesures(self):
-        if self._simulation_state:
-            self.table_mesures_ready.emit([(random.uniform(0, 30)), (random.uniform(0, 5))])
-        else:
-            if not self._is_open:
-                self.error_occurred.emit("Port non ouvert pour la lecture des données.")             
-            else:                
-                TensionValue = self._get_voltage() # Appelle méthode get_voltage qui utilise _query
-                CurrentValue = self._get_ampere() # Appelle méthode get_ampere qui utilise _query     
-                self.table_mesures_ready.emit([TensionValue, CurrentValue])
-        
-        
-    def _set_lock(self, state):
-        # si ocp acitf = 1 ou inactif = 0
-        self._send_command(f"LOCK{int(state)}")
-        
-        
-    def _remise_zero(self):
-            self._send_command("ISET1:0")
-            self._send_command("VSET1:0")
-            
-            
-
 class MainWindow(QMainWindow, Ui_MainWindow):
     """
     Fenêtre principale de l'application avec l'interface utilisateur.
@@ -334,19 +67,49 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     #pour le timer :
     start_timer_read_signal = pyqtSignal(int) # int = intervalle en ms
     stop_timer_read_signal = pyqtSignal()
+    change_timer_read_signal = pyqtSignal(int)
     set_default_query_timeout_signal = pyqtSignal(int)
-    demande_update_status_leds = pyqtSignal()
+    set_status_interval_signal = pyqtSignal(int)
+    demande_idn = pyqtSignal()
+    demande_statut = pyqtSignal()
+
+    # Nombre maximal d'échantillons gardés en mémoire (None = illimité)
+    CAPACITE_MESURES = None
+    # Nombre maximal de rafraîchissements de l'affichage par seconde
+    IMAGES_PAR_SECONDE = 20
+    # Période d'interrogation du statut (LEDs), indépendante du pas des mesures
+    PERIODE_STATUT_MS = 1000
+    # Dossier des fichiers de session écrits en continu pendant l'acquisition
+    DOSSIER_SESSIONS = pathlib.Path.home() / "rs3005p_sessions"
+    # Fichier proposé pour l'écriture des métriques (format texte de Prometheus)
+    FICHIER_METRIQUES = "rs3005p.prom"
+    # Politique de vidage du fichier de session et sa période
+    VIDAGE_SESSION = VIDAGE_FLUSH
+    PERIODE_VIDAGE_MS = 1000
+    # Colonnes des fichiers de mesures (session et export texte)
+    ENTETES_FICHIER = ("Temps", "Tension", "Courant", "Alim")
+    # Décimales écrites par colonne (fichier de session, CSV et TXT)
+    DECIMALES_FICHIER = (DECIMALES,) * 3 + (0,)
+    # Résolution des images exportées et nombre maximal de points par courbe en SVG
+    EXPORT_LARGEUR = 1600
+    EXPORT_HAUTEUR = 900
+    EXPORT_POINTS_VECTORIEL = 5000
     
     
     def __init__(self):
         super().__init__()
         self.setupUi(self)
         # --- Configuration du QThread et SerialWorker ---
-        self.thread = QThread()
-        self.worker = SerialWorker()
-        self.worker.moveToThread(self.thread) # IMPORTANT: Déplace le worker vers le nouveau thread
+        # Chaque alimentation a son worker dans son propre thread ; la première
+        # est celle pilotée par les commandes de la fenêtre
+        self.instruments = InstrumentManager(self)
+        principale = self.instruments.ajouter(relayer_messages=False)
+        self.thread = principale.thread
+        self.worker = principale.worker
         
         self.console.setReadOnly(True)
+        # Messages écrits en texte brut, une fois par image, dans une console de taille bornée
+        self.messages = ConsoleSink(self.console, self.statusbar, self.IMAGES_PAR_SECONDE, self)
         self.entreeCommande.setPlaceholderText("Entrez une commande SCPI (ex: VSET1:5)")
         self.entreeCommande.returnPressed.connect(self.send_custom_command)
               
@@ -380,20 +143,62 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         
         
         #Soucis de répetitions des consol log
-        self.worker.table_mesures_ready.connect(self.tableau)
-        self.worker.table_mesures_ready.connect(self.updateValue) 
+        # Les mesures sont mises en file, l'affichage est rafraîchi au plus IMAGES_PAR_SECONDE fois par seconde
+        self.presentation = PresentationScheduler(self.rafraichirAffichage, self.IMAGES_PAR_SECONDE, self)
+        self.instruments.mesure_prete.connect(self.presentation.soumettre)
+        # (LED, bits de STATUS? dont elle dépend), dans l'ordre de StatutAlim.leds
+        self._leds_statut = [(getattr(self, nom), masque) for nom, masque in statut.LEDS]
         self.worker.statut.connect(self.updateStatus)
-        
-        #Création des tableaux
-        self.Temps = []
-        self.Tension = []
-        self.Current=[]
-        
-        #Variable pour garder la position dans un tableau
-        self.savetime = 0
-        
-        #initialisation du timer
-        self.timerMesure = QTimer()
+
+        # Réglage de la cadence d'affichage, indépendant du pas des mesures
+        self.spinImages = QSpinBox()
+        self.spinImages.setRange(1, 60)
+        self.spinImages.setValue(self.IMAGES_PAR_SECONDE)
+        self.spinImages.setSuffix(" img/s")
+        self.spinImages.setToolTip("Nombre maximal de rafraîchissements de l'affichage par seconde")
+        self.spinImages.valueChanged.connect(self.presentation.set_images_par_seconde)
+        self.spinImages.valueChanged.connect(self.messages.set_images_par_seconde)
+        self.statusbar.addPermanentWidget(QLabel("Affichage :"))
+        self.statusbar.addPermanentWidget(self.spinImages)
+
+        # Cadence d'acquisition réellement obtenue
+        self.labelCadence = QLabel()
+        self.labelCadence.setToolTip("Cadence d'acquisition obtenue et nombre d'échéances manquées")
+        self.statusbar.addPermanentWidget(self.labelCadence)
+        
+        #Stockage des mesures (temps, tension, courant)
+        #La colonne instrument donne le numéro de l'alimentation (1 = principale)
+        self.mesures = MeasurementStore(capacite=self.CAPACITE_MESURES, colonnes_supp=("instrument",))
+
+        # Le tableau lit directement le stockage, les lignes sont publiées par lots
+        self.modeleDonnees = MeasurementTableModel(self.mesures, self, self.mesures.noms,
+                                                   MeasurementTableModel.ENTETES + ("Alim",))
+        self.Donnees.setModel(self.modeleDonnees)
+        self.Donnees.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.modeleDonnees.rowsInserted.connect(self.Donnees.scrollToBottom)
+        
+        # Les mesures stockées sont aussi écrites en continu dans un fichier de session
+        self.journal = StreamingLogger(self.DOSSIER_SESSIONS, self.VIDAGE_SESSION, self.PERIODE_VIDAGE_MS,
+                                       self.ENTETES_FICHIER, self.DECIMALES_FICHIER, self)
+        self.journal.erreur.connect(self.log_error)
+
+        # Exportations (CSV, TXT, binaire) en arrière-plan, plusieurs peuvent tourner en même temps
+        self.exports = ExportManager(self)
+        self.exports.progression.connect(self.afficherProgressionExport)
+        self.exports.termine.connect(self.finExport)
+
+        # Compteurs et latences des workers, affichés dans le panneau de diagnostic
+        self.diagnostic = DiagnosticsPanel(self.DOSSIER_SESSIONS / self.FICHIER_METRIQUES, self)
+        self.instruments.metriques_pretes.connect(self.diagnostic.mettre_a_jour)
+
+        #Instant (horloge du worker) qui correspond à t = 0 dans le stockage
+        self.t_origine = None
+        #Date et heure de la première mesure, et identification de l'appareil (métadonnées)
+        self.debut_mesures = None
+        self.idn = ""
+        
+        #L'acquisition est cadencée dans le thread du worker (voir AcquisitionScheduler)
+        self.timer_actif = False
         
         #variable d'aquisition pour servir d'indicateur aux fonctions qui nécessite un signal pour se connecter au timer
         self.aquisition = False
@@ -404,8 +209,6 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         
         # Liste des couleurs de courbes
         self.tab_couleur = ['b','g','r','c', 'm','y','black']
-        self.col = 0
-        self.row = 0
 
         # Couleur du fond du graphe
         self.graphique.setBackground("w")
@@ -420,12 +223,27 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.graphique.setLabel('bottom','Temps (s)', color ='black')
         self.graphique.showGrid(x = True, y = True, alpha = 0.3)        
 
+        # Courbes persistantes, mises à jour en place à chaque mesure
+        self.courbes = LivePlot(self.graphique, self.mesures)
+        self.courbes.ajouter_canal("tension", self.tab_couleur[0])
+        self.courbes.ajouter_canal("courant", self.tab_couleur[1])
+
         # Connecte les signaux de l'UI au worker
-        self.open_port_signal.connect(self.worker._open_port)
+        # Par l'Instrument principal, qui garde le port ouvert (métadonnées des sessions)
+        self.open_port_signal.connect(principale.open_port_signal)
         self.close_port_signal.connect(self.worker._close_port)
         self.start_read_mesures_request.connect(self.worker._read_mesures)
-        self.demande_update_status_leds.connect(self.worker._status_leds)
-        self.simulation_signal.connect(self.worker.signal_simu_received)
+        # L'acquisition démarre, s'arrête et change de pas pour toutes les alimentations
+        self.start_timer_read_signal.connect(self.instruments.demarrer_acquisition)
+        self.stop_timer_read_signal.connect(self.instruments.arreter_acquisition)
+        self.change_timer_read_signal.connect(self.instruments.changer_pas)
+        self.worker.cadence_acquisition.connect(self.afficherCadence)
+        self.set_status_interval_signal.connect(self.worker._set_status_interval)
+        self.set_status_interval_signal.emit(self.PERIODE_STATUT_MS)
+        self.demande_idn.connect(self.worker._request_idn)
+        self.demande_statut.connect(self.worker._request_status)
+        self.worker.statut_texte.connect(self.afficher_statut)
+        self.simulation_signal.connect(self.instruments.set_simulation)
         
         self.pasMesures.valueChanged.connect(self.changeTimer)
         
@@ -447,14 +265,23 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.btn_preset_out.clicked.connect(self.pre_commande_out)
         self.envoyerCommandes.clicked.connect(self.envoie_commandes)
         
+        # Les boutons de la console désactivent une catégorie de messages
+        self.btnDataConsole.toggled.connect(lambda coche: self.messages.activer(DONNEES, not coche))
+        self.btnErrorConsole.toggled.connect(lambda coche: self.messages.activer(ERREUR, not coche))
+        self.btn_effaceHistorique.clicked.connect(self.messages.effacer)
+
         # Connecte les signaux du worker à l'UI
         self.worker.data_received.connect(self.log_data_received)       
         self.worker.error_occurred.connect(self.log_error)
+        self.worker.identification.connect(self.set_idn)
+        # Messages des alimentations supplémentaires, préfixés par leur nom
+        self.instruments.data_received.connect(self.log_data_received)
+        self.instruments.error_occurred.connect(self.log_error)
         
 
         # Démarre le thread (le worker ne fera rien tant qu'il n'est pas appelé via ses slots)
         self.thread.start()
-        self.console.append("Application démarrée. Thread worker actif.")
+        self.messages.ecrire("Application démarrée. Thread worker actif.")
         self.statusbar.showMessage("Application démarrée. Thread worker actif.")
        
         self.info_port_connection() #Je lance automatiquement à l'init la connexion
@@ -462,7 +289,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def info_port_connection(self):
         port = self.spinBox_COM.value()
         self.start_connection(port)
-        self.console.append("Statut: Connexion en cours...")
+        self.messages.ecrire("Statut: Connexion en cours...")
         self.statusbar.showMessage("Statut: Connexion en cours...")
         
         
@@ -472,54 +299,42 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         num_port = va
         self.open_port_signal.emit(f"COM{num_port}", 9600)      
 
-        # Toujours déconnecter avant de (re)connecter pour éviter les connexions multiples
-        try:
-            self.timerMesure.timeout.disconnect() # Déconnecte TOUS les slots connectés au timeout
-               
-        except TypeError:
-            # Si aucun slot n'était connecté (premier démarrage par ex.), TypeError est levé, on l'ignore.
-            pass        
-        self.timerMesure.timeout.connect(self.start_read_mesures_request.emit)
-        self.timerMesure.start(self.pasMesures.value())
+        # Le cadenceur du worker redémarre de zéro s'il tournait déjà
+        self.start_timer_read_signal.emit(self.pasMesures.value())
+        self.timer_actif = True
         
 
 
     def stop_connection(self):
         """Demande au worker de fermer le port."""
         self.close_port_signal.emit()
-        self.console.append("Statut: Deconnexion en cours...")
+        self.messages.ecrire("Statut: Deconnexion en cours...")
         self.statusbar.showMessage("Statut: Deconnexion en cours...")
         
         
         #pour arreter le timer a la fin (partri de maniere propre du programme)
-        if self.timerMesure.isActive():
-            self.timerMesure.stop()
-            self.console.append("Arrêt de l'acquisition des mesures.")
-        try:
-            self.timerMesure.timeout.disconnect(self.start_read_mesures_request.emit)
-        except TypeError:
-            pass 
+        if self.timer_actif:
+            self.TimerStop()
+            self.messages.ecrire("Arrêt de l'acquisition des mesures.")
 
     @pyqtSlot(str)
+    @profilage.mesurer
     def log_data_received(self, data):
-        if not self.btnDataConsole.isChecked() :
-            self.console.append(f"<span style='color: blue;'>Reçu (générique): {data}</span>")
-            
-        self.statusbar.showMessage(data)
+        # Ignoré par la console si btnDataConsole est coché
+        self.messages.ecrire(data, DONNEES)
 
     @pyqtSlot(str)
+    @profilage.mesurer
     def log_error(self, error_message):
-        if not self.btnErrorConsole.isChecked():
-            self.console.append(f"<span style='color: red;'>Erreur: {error_message}</span>")
-        else:
-            return
+        # Ignoré par la console si btnErrorConsole est coché
+        self.messages.ecrire(error_message, ERREUR)
 
     def send_custom_command(self):
         """Envoie une commande tapée par l'utilisateur."""
         command = self.entreeCommande.text()
         if command:
             self.worker._send_command(command)
-            self.console.append(f"<span style='color: green;'>Envoyé: {command}</span>")
+            self.messages.ecrire(command, ENVOI)
             self.entreeCommande.clear()
 
     def envoie_commandes(self):
@@ -528,67 +343,61 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def on_request_idn_clicked(self):
         if self.worker._is_open:
-            self.console.append("Demande d'IDN envoyée (attente de réponse)...")
-            # Appel bloquant pour le worker, non pour l'UI
-            idn_response = self.worker._request_idn()
-            if not idn_response:
-                self.console.append("<span style='color: orange;'>Aucune réponse IDN ou timeout.</span>")
+            self.messages.ecrire("Demande d'IDN envoyée (attente de réponse)...")
+            # La réponse arrive dans la console par data_received
+            self.demande_idn.emit()
         else:
             self.log_error("Port non ouvert pour demander l'IDN.")
             
             
     def on_request_status_clicked(self):
         if self.worker._is_open:
-            self.console.append("Demande du statut envoyée (attente de réponse)...")
-            # Appel bloquant pour le worker, non pour l'UI
-            status_response = self.worker._request_status()
-            if not status_response:
-                self.console.append("<span style='color: orange;'>Aucune réponse de statut ou timeout.</span>")
-            else:
-                self.console.append(f"Statut reçu : {status_response}")
+            self.messages.ecrire("Demande du statut envoyée (attente de réponse)...")
+            # La réponse arrive par le signal statut_texte du worker
+            self.demande_statut.emit()
         else:
             self.log_error("Port non ouvert pour demander le statut")
 
+    @pyqtSlot(str)
+    def afficher_statut(self, status_response):
+        self.messages.ecrire(f"Statut reçu : {status_response}")
+
+    @profilage.mesurer
+    def rafraichirAffichage(self, echantillons):
+        """Appelée au plus IMAGES_PAR_SECONDE fois par seconde avec les mesures en attente."""
+        if self.aquisition:
+            for data_row_from_worker in echantillons:
+                self.tableau(data_row_from_worker)
+            self.journal.envoyer()
+            self.courbes.rafraichir()
+            self.graphique.show()
+            self.modeleDonnees.rafraichir()
+            self.btnReiniDonnees.setEnabled(True)
+            self.btnEnregistrer.setEnabled(True)
+            self.btnEnregistrerGraph.setEnabled(True)
+            self.btnReiniTout.setEnabled(True)
+            self.btnReiniGra.setEnabled(True)
+        # Les afficheurs ne montrent que la dernière mesure de l'alimentation principale
+        # (les LEDs suivent le signal statut)
+        for echantillon in reversed(echantillons):
+            if echantillon[3] == 1:
+                self.updateValue(echantillon)
+                break
+
     def updateValue(self, data_row_from_worker):
-        self.TensionValue, self.CurrentValue = data_row_from_worker
+        self.TensionValue, self.CurrentValue = data_row_from_worker[1:3]
         self.nbRealVoltage.display(self.TensionValue)
         self.nbRealAmpere.display(self.CurrentValue)
-        self.demande_update_status_leds.emit()
         
         
-    @pyqtSlot(str)
-    def updateStatus(self, s): 
-        if (s == "\12" or s== "↕" or s==""):
-            self.led_ocp.setState(2)
-            self.led_cc.setState(1)
-            self.led_cv.setState(1)
-            self.led_pn.setState(1)
-            
-        elif (s == "S"):
-            self.led_ocp.setState(2)
-            self.led_cc.setState(2)
-            self.led_cv.setState(0)
-            self.led_pn.setState(0)
-            
-        elif (s=="R"):
-            self.led_ocp.setState(0)
-            self.led_cc.setState(0)
-            self.led_cv.setState(2)
-            self.led_pn.setState(0)
-            
-        elif (s == "2"):
-            self.led_ocp.setState(0)
-            self.led_cc.setState(1)
-            self.led_cv.setState(1)
-            self.led_pn.setState(1)
-            
-        elif (s == "s"):
-            self.led_ocp.setState(0)
-            self.led_cc.setState(2)
-            self.led_cv.setState(0)
-            self.led_pn.setState(0)     
-            
-            
+    @pyqtSlot(object, int)
+    @profilage.mesurer
+    def updateStatus(self, etat, bits):
+        """LEDs d'état : seules celles qui dépendent d'un bit changé sont mises à jour, en un seul rafraîchissement."""
+        PyLedLabel.setStates((led, etat_led) for (led, masque), etat_led in zip(self._leds_statut, etat.leds)
+                             if bits & masque)
+
+
     @pyqtSlot(bool)
     def OCP_mode(self):
         if self.buttonOCP.isChecked():
@@ -644,118 +453,89 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
          
     def resdonnees(self):
-        self.Temps, self.Tension, self.Current=[],[],[]
+        self.mesures.vider()
+        self.t_origine = None
+        self.debut_mesures = None
+        # La prochaine mesure ouvrira un nouveau fichier de session
+        self.journal.terminer_session()
         
         
     def TimerStop(self):
-        self.timerMesure.stop()
-        # IMPORTANT : Déconnectez le signal pour éviter des connexions multiples
-        try:
-            self.timerMesure.timeout.disconnect(self.start_read_mesures_request.emit)
-        except TypeError:
-            # Ignore l'erreur si le signal n'était pas connecté
-            pass
+        self.stop_timer_read_signal.emit()
+        self.timer_actif = False
         
         
     def changeTimer(self, valeur):
-        self.timerMesure.stop()
-        self.timerMesure.start(valeur)
+        self.change_timer_read_signal.emit(valeur)
+
+    @pyqtSlot(float, int)
+    def afficherCadence(self, echantillons_par_s, manquees):
+        self.labelCadence.setText(f"{echantillons_par_s:.1f} éch/s, {manquees} manquée(s)")
 
     def mode_simu(self, state):
         self.simulation_signal.emit(state)
         if state==0:
-            self.console.append("Le mode de simulation est Desactif")
+            self.messages.ecrire("Le mode de simulation est Desactif")
 
         else:
-            self.console.append("Le mode de simulation est Actif")
+            self.messages.ecrire("Le mode de simulation est Actif")
         
+    @profilage.mesurer
     def tableau(self, data_row_from_worker):   
+        """Range une mesure dans le stockage (l'affichage est fait par rafraichirAffichage)."""
         if self.aquisition is False:
             return
         else:
-            acquisition_interval_s = self.pasMesures.value() / 1000.0
-            if len(self.Temps) > 0:
-                self.Temps.append(self.Temps[-1] + acquisition_interval_s)
-            elif self.savetime :
-                self.Temps.append(self.savetime + acquisition_interval_s)
-            
-            else:
-                self.Temps.append(0)
-                         
             # Récuperation des tableaux :            
-            self.TensionValue, self.CurrentValue = data_row_from_worker
-            
-            
-            self.Tension.append(self.TensionValue)
-            self.Current.append(self.CurrentValue)
-                
-            # Affichage de la courbe
-            self.graphique.plot(self.Temps, self.Tension, symbolBrush=(self.tab_couleur[0]))
-            self.graphique.plot(self.Temps, self.Current, symbolBrush=(self.tab_couleur[1]))
-            self.graphique.show()
-            row = self.Donnees.rowCount()
-            if self.row >= row:
-                self.Donnees.insertRow(row)
-            self.Donnees.setItem(row, self.col, 
-                                 QTableWidgetItem("{:.2f}".format(self.Temps[-1])))
-            self.Donnees.setItem(self.row,self.col+1,
-                                  QTableWidgetItem("{:.2f}".format(self.TensionValue)))
-            self.Donnees.setItem(self.row,self.col+2,
-                                  QTableWidgetItem("{:.2f}".format(self.CurrentValue)))
-            self.row += 1     
-            
-            self.Donnees.scrollToBottom()
-            self.btnReiniDonnees.setEnabled(True)
-            self.btnEnregistrer.setEnabled(True)
-            self.btnEnregistrerGraph.setEnabled(True)
-            self.btnReiniTout.setEnabled(True)
-            self.btnReiniGra.setEnabled(True)
+            instant, TensionValue, CurrentValue, instrument = data_row_from_worker
+            # Le temps est celui mesuré par le worker, compté depuis la première mesure
+            if self.t_origine is None:
+                self.t_origine = instant
+                self.debut_mesures = QDateTime.currentDateTime()
+            temps = instant - self.t_origine
+            self.mesures.ajouter(temps, TensionValue, CurrentValue, instrument)
+            self.journal.ajouter(temps, TensionValue, CurrentValue, instrument)
 
     def TimerStartMesure(self):
         if self.btnCommencer.text() != "Pause":
             if self.btnCommencer.text() == "Commencer l'enregistrement":
-                self.console.append("Début de l'enregistrement des mesures")
+                self.messages.ecrire("Début de l'enregistrement des mesures")
                 self.btnCommencer.setText('Pause')
                 self.aquisition = True
 
             elif self.btnCommencer.text() == "Continuer":
-                self.console.append("Reprise des mesures")
+                self.messages.ecrire("Reprise des mesures")
                 self.btnCommencer.setText('Pause')
                 self.aquisition = True
 
         elif self.btnCommencer.text() == "Pause":
-            self.console.append("Pause, les mesures sont stopées")
+            self.messages.ecrire("Pause, les mesures sont stopées")
             self.btnCommencer.setText('Continuer')
             self.aquisition = False
 
 
     def reiniTab(self):
-        while self.Donnees.rowCount() > 0:
-            self.Donnees.removeRow(0)
-        while self.Donnees.columnCount() > 3:
-            self.Donnees.removeColumn(0)            
-        self.row = 0
         self.resdonnees()
+        self.modeleDonnees.reinitialiser()
 
             
     def reiniGraphique(self):
-        self.savetime = self.Temps[-1] if self.Temps else None
-        self.resdonnees()
-        self.graphique.clear()
+        # Le stockage et la base de temps sont gardés pour le tableau, seul le graphique est effacé
+        self.courbes.vider()
 
              
     def reiniAll(self):    
         self.aquisition = False
         self.resdonnees()
         self.reiniTab()
-        self.graphique.clear() # ne pas mettre directement self.reiniGraphique() car on souhaite repartire de 0   mais ca marchr pas epiaenhpefoiefhoihioae  
+        self.courbes.vider() # ne pas mettre directement self.reiniGraphique() car on souhaite repartire de 0   mais ca marchr pas epiaenhpefoiefhoihioae  
         self.btnReiniDonnees.setEnabled(False)
         self.btnEnregistrer.setEnabled(False)
         self.btnEnregistrerGraph.setEnabled(False)
         self.btnReiniTout.setEnabled(False)
         self.btnReiniGra.setEnabled(False)
         self.btnCommencer.setText("Commencer l'enregistrement")
-        self.console.append("Reinitialisation, les mesures sont stopées")
+        self.messages.ecrire("Reinitialisation, les mesures sont stopées")
     
     def enregTab(self):
         # Génère un nom de fichier par défaut avec la date et l'heure actuelles
@@ -765,40 +545,87 @@ class MainWindow(QMainWindow, Ui_MainWindow):
        # Propose des filtres pour les fichiers texte et CSV
         file_path, selected_filter = QFileDialog.getSaveFileName(
            self, 'Sauvegarder les données', default_file_name,
-           'Fichier CSV (*.csv);;Fichier texte (*.txt);;Tous les fichiers (*)')
+           'Fichier CSV (*.csv);;Fichier texte (*.txt);;Fichier binaire (*.rsm);;Tous les fichiers (*)')
 
        # Si l'utilisateur annule la boîte de dialogue (aucune sélection de chemin)
         if not file_path:
-           self.console.append("<b style='color:red'>Enregistrement annulé</b><br>")
+           self.messages.ecrire("Enregistrement annulé")
            return
 
+        # Format binaire en colonnes, relisible par fichier_binaire.lire (np.memmap)
+        if selected_filter == 'Fichier binaire (*.rsm)' or file_path.lower().endswith(fichier_binaire.EXTENSION):
+            self.enregBinaire(file_path)
+            return
+
        # Détermine le séparateur en fonction du filtre sélectionné ou de l'extension du fichier
        # Le séparateur par défaut est la virgule pour CSV, l'espace pour TXT
         separator = "," if selected_filter == 'Fichier CSV (*.csv)' or file_path.lower().endswith('.csv') else " "
 
-       #Enregistrement des listes self.Temps, self.Tension, self.Current
-        try:
-            with open(file_path, "w") as file:
-               # Écrit les en-têtes de colonnes
-                if separator == ",":
-                   file.write("Temps,Tension,Courant\n")
-                else:
-                   file.write("Temps Tension Courant\n")
-
-               # Écrit chaque ligne de données
-                for x, y, z in zip(self.Temps, self.Tension, self.Current):
-                   file.write(f"{x}{separator}{y}{separator}{z}\n")
-
-           # Affiche un message de succès dans le widget self.console
-            path_obj = pathlib.Path(file_path)
-            self.console.append(f"<b style='color:green'>{path_obj.name}</b> : Enregistrement de {len(self.Temps)} points fait.<br>")
-
-        except Exception as e:
-           # Affiche un message d'erreur si l'enregistrement échoue
-           self.console.appen(f"<b style='color:red'>Erreur lors de l'enregistrement des données principales : {e}</b><br>")
-           return # Arrête la fonction si l'enregistrement principal échoue
-       
-        
+        # L'écriture se fait dans un thread à part, sur une copie des données prise maintenant
+        # En mode anneau, le stockage a pu perdre les plus anciennes mesures : le fichier de session
+        # ne correspond alors plus au tableau et au graphique, on exporte le stockage
+        complet = len(self.mesures) == self.mesures.total
+        if separator == "," and self.journal.chemin is not None and complet:
+            # En CSV, le fichier de session contient déjà toutes les mesures (même formatage) :
+            # il suffit de le copier, une fois écrit sur le disque par la tâche d'exportation
+            self.journal.envoyer()
+            lance = self.exports.copier(str(self.journal.chemin), file_path, self.journal.attendre_ecriture)
+        else:
+            #Enregistrement des colonnes temps, tension, courant du stockage
+            lance = self.exports.exporter_texte(file_path, self.ENTETES_FICHIER, self.mesures.tableau().copy(),
+                                                separator, self.DECIMALES_FICHIER)
+        self.signalerExport(file_path, lance, len(self.mesures))
+
+
+    def signalerExport(self, file_path, lance, nb_points):
+        if lance:
+            self.statusbar.showMessage(f"Enregistrement de {pathlib.Path(file_path).name} ({nb_points} points)...")
+        else:
+            self.messages.ecrire(f"{pathlib.Path(file_path).name} est déjà en cours d'enregistrement")
+
+
+    @pyqtSlot(str, int)
+    def afficherProgressionExport(self, file_path, pourcentage):
+        self.statusbar.showMessage(f"Enregistrement de {pathlib.Path(file_path).name} : {pourcentage} %")
+
+
+    @pyqtSlot(str, str)
+    def finExport(self, file_path, erreur):
+        nom = pathlib.Path(file_path).name
+        if erreur:
+            self.messages.ecrire(f"Erreur lors de l'enregistrement de {nom} : {erreur}")
+            self.statusbar.showMessage(f"Échec de l'enregistrement de {nom}", 5000)
+        else:
+            self.messages.ecrire(f"{nom} : Enregistrement fait.")
+            self.statusbar.showMessage(f"{nom} enregistré", 5000)
+
+
+    def metadonnees(self):
+        """Informations sur l'acquisition enregistrées avec les mesures."""
+        return {
+            "idn": self.idn,
+            "instruments": {str(instrument.numero): {"nom": instrument.nom, "port": instrument.port}
+                            for instrument in self.instruments},
+            "consigne_tension": self.spinVoltage.value(),
+            "consigne_courant": self.spinAmpere.value(),
+            "pas_mesures_ms": self.pasMesures.value(),
+            "debut": self.debut_mesures.toString(Qt.ISODateWithMs) if self.debut_mesures is not None else None,
+            "unites": {"temps": "s", "tension": "V", "courant": "A"},
+        }
+
+
+    def enregBinaire(self, file_path):
+        if not file_path.lower().endswith(fichier_binaire.EXTENSION):
+            file_path += fichier_binaire.EXTENSION
+        lance = self.exports.exporter_binaire(file_path, self.mesures.noms, self.mesures.tableau().copy(), self.metadonnees())
+        self.signalerExport(file_path, lance, len(self.mesures))
+
+
+    @pyqtSlot(str)
+    def set_idn(self, idn):
+        self.idn = idn.strip()
+
+
     def enregGraph(self):
         # Génère un nom de fichier par défaut avec la date et l'heure actuelles
         default_file_name = "data_" + QDateTime.currentDateTime().toString("yyyy-MM-dd_hh.mm.ss")
@@ -809,17 +636,20 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             "Images PNG (*.png);;Images JPG (*.jpg);;Fichiers SVG (*.svg);;Tous les fichiers (*.*)")
     
         if file_name: # Si l'utilisateur a sélectionné un fichier
-            exporter = pg.exporters.ImageExporter(self.graphique.plotItem)
-
-            # Définir la résolution (optionnel, mais utile pour la qualité)
-            # exporter.parameters()['width'] = 800 # Largeur en pixels
-            # exporter.parameters()['height'] = 600 # Hauteur en pixels
-
-            # Exporter vers le fichier
-            exporter.export(file_name)
-            self.console.append(f"<span style='color: green;'>Graphique enregistré sous : {file_name}</span>")
+            if not pathlib.Path(file_name).suffix:
+                file_name += ".png"
+            # Copie décimée des courbes : au plus EXPORT_POINTS_VECTORIEL points en SVG,
+            # environ deux points par pixel pour les images
+            if file_name.lower().endswith(".svg"):
+                nb_points = self.EXPORT_POINTS_VECTORIEL
+            else:
+                nb_points = 2 * self.EXPORT_LARGEUR
+            instantane = rendu_graphique.capturer(self.graphique, self.courbes, nb_points)
+            # Le dessin et l'écriture se font dans un thread d'exportation
+            lance = self.exports.exporter_graphique(file_name, instantane, self.EXPORT_LARGEUR, self.EXPORT_HAUTEUR)
+            self.signalerExport(file_name, lance, sum(len(c[0]) for c in instantane.courbes))
         else:
-            self.console.append("<span style='color: orange;'>Enregistrement du graphique annulé.</span>")
+            self.messages.ecrire("Enregistrement du graphique annulé.")
     
     def enregistreTout(self):
         self.enregGraph()
@@ -895,16 +725,48 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.actionGraphique.triggered.connect(self.afficherGraphique)
         self.actionMode_expert.triggered.connect(self.afficherExpert)
         self.actionMode_simple.triggered.connect(self.afficherSimple)
+        self.actionAjouterAlim = self.menuParam_tres.addAction("Ajouter une alimentation...")
+        self.actionAjouterAlim.triggered.connect(self.ajouterAlimentation)
+        self.actionDiagnostic = self.menuParam_tres.addAction("Diagnostic de la communication...")
+        self.actionDiagnostic.triggered.connect(self.afficherDiagnostic)
         
 
+    def afficherDiagnostic(self):
+        self.diagnostic.show()
+        self.diagnostic.raise_()
+
+
+    def ajouterAlimentation(self):
+        """Ajoute une alimentation sur un autre port ; ses mesures rejoignent le stockage et le graphique."""
+        numero = len(self.instruments) + 1
+        port, ok = QInputDialog.getText(self, "Ajouter une alimentation",
+                                        f"Port série de l'alimentation {numero} :", text=f"COM{numero}")
+        if not ok or not port.strip():
+            return
+        if numero == 2:
+            # Les courbes de l'alimentation principale ne tracent plus que ses propres lignes
+            for canal in ("tension", "courant"):
+                self.courbes.retirer_canal(canal)
+                self.courbes.ajouter_canal(canal, self.tab_couleur[len(self.courbes.canaux())], 1)
+        instrument = self.instruments.ajouter(port=port.strip())
+        for canal in ("tension", "courant"):
+            couleur = self.tab_couleur[len(self.courbes.canaux()) % len(self.tab_couleur)]
+            self.courbes.ajouter_canal(canal, couleur, instrument.numero)
+        instrument.ouvrir()
+        if self.timer_actif:
+            instrument.start_timer_read_signal.emit(self.pasMesures.value())
+        self.messages.ecrire(f"{instrument.nom} ajoutée sur {port.strip()}")
+
+
     def closeEvent(self, event):
-        """Gère la fermeture de la fenêtre pour arrêter le thread proprement."""
+        """Gère la fermeture de la fenêtre pour arrêter les threads proprement."""
         self.stop_connection() # Demande au worker de fermer le port
-        self.thread.quit()     # Demande au thread de quitter sa boucle d'événements
-        self.thread.wait(3000) # Attendre que le thread se termine (max 3 secondes)
-        if self.thread.isRunning():
-            self.thread.terminate() # Forcer l'arrêt si le thread ne répond pas
-            self.console.append("<span style='color: orange;'>Le thread a dû être terminé de force.</span>")
+        self.instruments.fermer() # Ferme aussi les ports des autres alimentations
+        self.exports.attendre() # Laisse finir les enregistrements en cours (une copie attend le fichier de session)
+        self.journal.arreter() # Écrit les dernières mesures et ferme le fichier de session
+        # Demande aux threads de quitter leur boucle d'événements (max 3 secondes chacun)
+        if not self.instruments.arreter(3000):
+            self.messages.ecrire("Le thread a dû être terminé de force.")
         event.accept() # Accepter l'événement de fermeture de la fenêtre
 
 
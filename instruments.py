@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Gestion de plusieurs alimentations en parallèle.
+
+Chaque Instrument possède son SerialWorker et son QThread : une alimentation
+lente ou muette ne retarde pas les autres, et en ajouter une ne charge pas le
+thread de l'interface. Les mesures de tous les workers sont datées avec
+time.perf_counter(), horloge commune à tout le processus : elles sont
+directement comparables et fusionnées dans un seul flux, chaque échantillon
+portant le numéro (à partir de 1) de l'alimentation qui l'a produit.
+"""
+
+from PyQt5.QtCore import QObject, QThread, QMetaObject, Qt, pyqtSignal, pyqtSlot
+
+from worker_serie import SerialWorker
+
+
+class Instrument(QObject):
+    """
+    Une alimentation : son SerialWorker et le QThread dans lequel il tourne.
+    port est le port ouvert (None tant qu'aucun ne l'est) ; les ouvertures
+    passent par open_port_signal pour qu'il soit connu.
+    """
+
+    open_port_signal = pyqtSignal(str, int)
+    close_port_signal = pyqtSignal()
+    start_timer_read_signal = pyqtSignal(int)
+    stop_timer_read_signal = pyqtSignal()
+    change_timer_read_signal = pyqtSignal(int)
+    simulation_signal = pyqtSignal(bool)
+
+    # Mesure [instant, tension, courant, numéro] et messages préfixés par le nom
+    mesure = pyqtSignal(list)
+    data_received = pyqtSignal(str)
+    error_occurred = pyqtSignal(str)
+    metriques = pyqtSignal(int, object)   # (numéro, instantané de WorkerMetrics)
+
+    def __init__(self, numero, nom, port=None, baud=9600, parent=None):
+        super().__init__(parent)
+        self.numero = numero
+        self.nom = nom
+        self.port = None
+        self._port_demande = port
+        self.baud = baud
+        self.thread = QThread()
+        self.thread.setObjectName(f"worker {nom}")
+        self.worker = SerialWorker()
+        self.worker.moveToThread(self.thread)
+        self.open_port_signal.connect(self.worker._open_port)
+        self.open_port_signal.connect(self._on_ouverture_demandee)
+        self.close_port_signal.connect(self.worker._close_port)
+        self.start_timer_read_signal.connect(self.worker._start_acquisition)
+        self.stop_timer_read_signal.connect(self.worker._stop_acquisition)
+        self.change_timer_read_signal.connect(self.worker._set_acquisition_interval)
+        self.simulation_signal.connect(self.worker.signal_simu_received)
+        self.worker.table_mesures_ready.connect(self._on_mesure)
+        self.worker.data_received.connect(self._on_data)
+        self.worker.error_occurred.connect(self._on_erreur)
+        self.worker.metriques_pretes.connect(self._on_metriques)
+        self.worker.port_status.connect(self._on_port_status)
+
+    def ouvrir(self):
+        if self._port_demande is not None:
+            self.open_port_signal.emit(self._port_demande, self.baud)
+
+    def fermer(self):
+        self.close_port_signal.emit()
+
+    def arreter_thread(self, attente_ms=3000):
+        """Arrête le thread du worker ; renvoie False s'il a fallu le terminer de force."""
+        # quit() peut abandonner les événements en attente : on attend d'abord que le
+        # worker ait traité ce qui lui a été envoyé (fermeture du port, remise à zéro)
+        if self.thread.isRunning():
+            QMetaObject.invokeMethod(self.worker, "_synchroniser", Qt.BlockingQueuedConnection)
+        self.thread.quit()
+        self.thread.wait(attente_ms)
+        if self.thread.isRunning():
+            self.thread.terminate()
+            return False
+        return True
+
+    @pyqtSlot(str, int)
+    def _on_ouverture_demandee(self, port, baud):
+        self._port_demande = port
+        self.baud = baud
+
+    @pyqtSlot(bool, str)
+    def _on_port_status(self, ouvert, message):
+        # Les réponses du worker arrivent dans l'ordre des demandes
+        self.port = self._port_demande if ouvert else None
+
+    @pyqtSlot(list)
+    def _on_mesure(self, echantillon):
+        self.mesure.emit(echantillon + [self.numero])
+
+    @pyqtSlot(str)
+    def _on_data(self, message):
+        self.data_received.emit(f"[{self.nom}] {message}")
+
+    @pyqtSlot(str)
+    def _on_erreur(self, message):
+        self.error_occurred.emit(f"[{self.nom}] {message}")
+
+    @pyqtSlot(object)
+    def _on_metriques(self, instantane):
+        self.metriques.emit(self.numero, instantane)
+
+
+class InstrumentManager(QObject):
+    """
+    Liste des alimentations. Les commandes d'acquisition (démarrer, arrêter,
+    changer le pas, simulation) sont envoyées à toutes ; mesure_prete
+    rassemble les échantillons de toutes les alimentations.
+    """
+
+    mesure_prete = pyqtSignal(list)   # [instant (time.perf_counter), tension, courant, numéro]
+    data_received = pyqtSignal(str)
+    error_occurred = pyqtSignal(str)
+    metriques_pretes = pyqtSignal(int, object)   # (numéro, instantané de WorkerMetrics)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.instruments = []
+        self._simulation = False
+
+    def __len__(self):
+        return len(self.instruments)
+
+    def __iter__(self):
+        return iter(self.instruments)
+
+    def __getitem__(self, index):
+        return self.instruments[index]
+
+    def ajouter(self, nom=None, port=None, baud=9600, relayer_messages=True):
+        """
+        Crée une alimentation (numérotée à partir de 1) et démarre son thread.
+        relayer_messages=False si l'appelant se branche lui-même sur les
+        signaux du worker.
+        """
+        numero = len(self.instruments) + 1
+        instrument = Instrument(numero, nom or f"Alim {numero}", port, baud, self)
+        instrument.mesure.connect(self.mesure_prete)
+        instrument.metriques.connect(self.metriques_pretes)
+        if relayer_messages:
+            instrument.data_received.connect(self.data_received)
+            instrument.error_occurred.connect(self.error_occurred)
+        self.instruments.append(instrument)
+        instrument.thread.start()
+        instrument.simulation_signal.emit(self._simulation)
+        return instrument
+
+    @pyqtSlot(int)
+    def demarrer_acquisition(self, pas_ms):
+        for instrument in self.instruments:
+            instrument.start_timer_read_signal.emit(pas_ms)
+
+    @pyqtSlot()
+    def arreter_acquisition(self):
+        for instrument in self.instruments:
+            instrument.stop_timer_read_signal.emit()
+
+    @pyqtSlot(int)
+    def changer_pas(self, pas_ms):
+        for instrument in self.instruments:
+            instrument.change_timer_read_signal.emit(pas_ms)
+
+    @pyqtSlot(bool)
+    def set_simulation(self, actif):
+        self._simulation = bool(actif)
+        for instrument in self.instruments:
+            instrument.simulation_signal.emit(self._simulation)
+
+    def fermer(self):
+        """Ferme les ports de toutes les alimentations (remise à zéro comprise)."""
+        for instrument in self.instruments:
+            instrument.fermer()
+
+    def arreter(self, attente_ms=3000):
+        """Arrête tous les threads ; renvoie False si l'un d'eux a dû être terminé de force."""
+        return all([instrument.arreter_thread(attente_ms) for instrument in self.instruments])
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Sortie des messages vers la console de la fenêtre principale.
+
+Les messages sont mis en file et écrits en texte brut une fois par image,
+en un seul ajout. La console garde au plus LIGNES_MAX lignes, un message
+répété est regroupé sur une seule ligne ("×N"), et chaque catégorie peut
+être limitée à un nombre de messages par seconde ou désactivée. Les
+messages refusés par la limite sont résumés en une ligne, au plus une
+fois par seconde et par catégorie.
+"""
+
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSlot
+from PyQt5.QtGui import QTextCursor
+
+import profilage
+
+
+DONNEES = "donnees"   # réponses de l'appareil
+ERREUR = "erreur"     # erreurs du worker
+ENVOI = "envoi"       # commandes tapées par l'utilisateur
+INFO = "info"         # messages de l'interface
+
+
+class ConsoleSink(QObject):
+    """
+    console : QPlainTextEdit. barre_etat (optionnelle) reçoit à chaque
+    image le dernier message de la catégorie DONNEES.
+    """
+
+    LIGNES_MAX = 1000
+    # Messages par seconde et par catégorie (catégorie absente = pas de limite)
+    CADENCE_MAX = {DONNEES: 20, ERREUR: 10}
+    PREFIXES = {DONNEES: "Reçu: ", ERREUR: "Erreur: ", ENVOI: "Envoyé: ", INFO: ""}
+
+    def __init__(self, console, barre_etat=None, images_par_seconde=20, parent=None):
+        super().__init__(parent)
+        self._console = console
+        self._console.setMaximumBlockCount(self.LIGNES_MAX)
+        self._barre_etat = barre_etat
+        self._attente = []          # [catégorie, texte, nombre] pas encore écrits
+        self._affichee = None       # [catégorie, texte, nombre] de la dernière ligne de la console
+        self._reecrire = False      # le compteur de la dernière ligne a changé
+        self._desactivees = set()
+        self._fenetres = {}         # catégorie -> [début de la seconde en cours, messages acceptés]
+        self._ignores = {}          # catégorie -> messages refusés par la limite, pas encore signalés
+        self._resumes = {}          # catégorie -> instant (time.monotonic) du dernier résumé écrit
+        self._dernier_recu = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(int(1000 / images_par_seconde))
+        self._timer.timeout.connect(self.vider)
+
+    @pyqtSlot(int)
+    def set_images_par_seconde(self, images_par_seconde):
+        if images_par_seconde > 0:
+            self._timer.setInterval(int(1000 / images_par_seconde))
+
+    def activer(self, categorie, actif=True):
+        if actif:
+            self._desactivees.discard(categorie)
+        else:
+            self._desactivees.add(categorie)
+
+    def ecrire(self, texte, categorie=INFO):
+        """Met un message en file (sans effet si sa catégorie est désactivée)."""
+        if categorie in self._desactivees:
+            return
+        if categorie == DONNEES:
+            self._dernier_recu = texte
+        dernier = self._attente[-1] if self._attente else self._affichee
+        if dernier is not None and dernier[0] == categorie and dernier[1] == texte:
+            dernier[2] += 1
+            self._reecrire = self._reecrire or dernier is self._affichee
+        elif self._autorise(categorie):
+            self._attente.append([categorie, texte, 1])
+        else:
+            self._ignores[categorie] = self._ignores.get(categorie, 0) + 1
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @pyqtSlot()
+    @profilage.mesurer
+    def vider(self):
+        """Écrit les messages en attente dans la console, en un seul ajout."""
+        self._timer.stop()
+        if self._reecrire:
+            curseur = QTextCursor(self._console.document().lastBlock())
+            curseur.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+            curseur.insertText(self._ligne(self._affichee))
+            self._reecrire = False
+        lignes = [self._ligne(message) for message in self._attente]
+        resumes = self._lignes_resume()
+        if lignes or resumes:
+            self._console.appendPlainText("\n".join(lignes + resumes))
+            self._affichee = self._attente[-1] if self._attente and not resumes else None
+        self._attente = []
+        if self._ignores:
+            # Résumé retenu jusqu'à la fin de la seconde en cours
+            self._timer.start()
+        if self._barre_etat is not None and self._dernier_recu is not None:
+            self._barre_etat.showMessage(self._dernier_recu)
+            self._dernier_recu = None
+
+    def effacer(self):
+        self._timer.stop()
+        self._attente = []
+        self._ignores.clear()
+        self._resumes.clear()
+        self._affichee = None
+        self._reecrire = False
+        self._console.clear()
+
+    def _autorise(self, categorie):
+        limite = self.CADENCE_MAX.get(categorie)
+        if limite is None:
+            return True
+        maintenant = time.monotonic()
+        fenetre = self._fenetres.get(categorie)
+        if fenetre is None or maintenant - fenetre[0] >= 1.0:
+            fenetre = self._fenetres[categorie] = [maintenant, 0]
+        fenetre[1] += 1
+        return fenetre[1] <= limite
+
+    def _lignes_resume(self):
+        """Une ligne par catégorie limitée, au plus une fois par seconde, avec le total des messages refusés."""
+        maintenant = time.monotonic()
+        lignes = []
+        for categorie, nombre in list(self._ignores.items()):
+            if maintenant - self._resumes.get(categorie, float('-inf')) >= 1.0:
+                lignes.append(f"... {nombre} message(s) '{categorie}' ignoré(s) "
+                              f"(limite {self.CADENCE_MAX[categorie]}/s)")
+                self._resumes[categorie] = maintenant
+                del self._ignores[categorie]
+        return lignes
+
+    def _ligne(self, message):
+        categorie, texte, nombre = message
+        ligne = self.PREFIXES.get(categorie, "") + texte
+        return f"{ligne} ×{nombre}" if nombre > 1 else ligne
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Mesures de fonctionnement du SerialWorker.
+
+WorkerMetrics est tenu par le worker, dans son thread : histogramme de
+latence par requête SCPI, compteurs (timeouts, erreurs de décodage, de
+trame, d'écriture, échéances manquées, octets reçus et envoyés) et cadence
+obtenue. Le worker en émet périodiquement un instantané (dict de valeurs
+simples, sans référence aux objets du worker) qui peut être affiché par le
+panneau de diagnostic ou écrit par MetricsExporter dans un fichier au
+format texte de Prometheus.
+"""
+
+import bisect
+import os
+import pathlib
+import time
+
+
+# Bornes supérieures des classes de latence (s), comme les "buckets" de Prometheus
+BORNES_LATENCE = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+
+# (nom, type, aide) des valeurs de l'instantané écrites dans le fichier
+COMPTEURS = (
+    ("transactions", "counter", "Transactions terminées (requêtes et commandes)"),
+    ("echantillons", "counter", "Échantillons tension/courant mesurés"),
+    ("timeouts", "counter", "Requêtes restées sans réponse"),
+    ("erreurs_decodage", "counter", "Réponses illisibles (décodage ou conversion en nombre)"),
+    ("erreurs_trame", "counter", "Octets rejetés par le découpage des trames"),
+    ("erreurs_ecriture", "counter", "Échecs d'écriture sur le port"),
+    ("echeances_manquees", "counter", "Échéances d'acquisition sautées"),
+    ("octets_recus", "counter", "Octets lus sur le port"),
+    ("octets_envoyes", "counter", "Octets écrits sur le port"),
+    ("cadence", "gauge", "Échantillons par seconde obtenus (dernière seconde)"),
+)
+PREFIXE = "rs3005p"
+
+
+class LatencyHistogram:
+    """Histogramme cumulable à classes fixes (BORNES_LATENCE, puis +Inf)."""
+
+    __slots__ = ("comptes", "somme", "nombre", "maximum")
+
+    def __init__(self):
+        self.comptes = [0] * (len(BORNES_LATENCE) + 1)
+        self.somme = 0.0
+        self.nombre = 0
+        self.maximum = 0.0
+
+    def ajouter(self, duree):
+        self.comptes[bisect.bisect_left(BORNES_LATENCE, duree)] += 1
+        self.somme += duree
+        self.nombre += 1
+        if duree > self.maximum:
+            self.maximum = duree
+
+    def copie(self):
+        return {"comptes": list(self.comptes), "somme": self.somme, "nombre": self.nombre, "maximum": self.maximum}
+
+
+def quantile(histogramme, q):
+    """Estime le quantile q (0-1) d'un histogramme copié, par interpolation dans sa classe."""
+    nombre = histogramme["nombre"]
+    if not nombre:
+        return None
+    rang = q * nombre
+    cumul = 0
+    for k, compte in enumerate(histogramme["comptes"]):
+        if compte and cumul + compte >= rang:
+            bas = BORNES_LATENCE[k - 1] if k > 0 else 0.0
+            haut = BORNES_LATENCE[k] if k < len(BORNES_LATENCE) else histogramme["maximum"]
+            return min(bas + (haut - bas) * (rang - cumul) / compte, histogramme["maximum"])
+        cumul += compte
+    return histogramme["maximum"]
+
+
+class WorkerMetrics:
+    """Compteurs du worker ; à n'utiliser que dans le thread du worker."""
+
+    def __init__(self):
+        self.latences = {}         # commande -> LatencyHistogram
+        self.transactions = 0
+        self.echantillons = 0
+        self.timeouts = 0
+        self.erreurs_decodage = 0
+        self.erreurs_ecriture = 0
+        self.octets_recus = 0
+        self.octets_envoyes = 0
+        self.cadence = 0.0
+
+    def transaction_terminee(self, transaction):
+        """Observateur du TransactionEngine."""
+        self.transactions += 1
+        # Écriture échouée : déjà comptée dans erreurs_ecriture, ce n'est pas un timeout
+        if not transaction.attend_reponse or not transaction.ecrite:
+            return
+        if transaction.reponse is None:
+            self.timeouts += 1
+            return
+        # VSET1:5 et VSET1:12 -> une seule série "VSET1"
+        commande = transaction.commande.partition(":")[0]
+        histogramme = self.latences.get(commande)
+        if histogramme is None:
+            histogramme = self.latences[commande] = LatencyHistogram()
+        histogramme.ajouter(transaction.t_reponse - transaction.t_envoi)
+
+    def instantane(self, erreurs_trame=0, echeances_manquees=0):
+        """Copie des valeurs, transmissible à un autre thread."""
+        return {
+            "instant": time.time(),
+            "transactions": self.transactions,
+            "echantillons": self.echantillons,
+            "timeouts": self.timeouts,
+            "erreurs_decodage": self.erreurs_decodage,
+            "erreurs_trame": erreurs_trame,
+            "erreurs_ecriture": self.erreurs_ecriture,
+            "echeances_manquees": echeances_manquees,
+            "octets_recus": self.octets_recus,
+            "octets_envoyes": self.octets_envoyes,
+            "cadence": self.cadence,
+            "latences": {commande: h.copie() for commande, h in self.latences.items()},
+        }
+
+
+def _etiquettes(**valeurs):
+    texte = ",".join('{}="{}"'.format(nom, str(valeur).replace("\\", "\\\\").replace('"', '\\"')
+                                      .replace("\n", "\\n")) for nom, valeur in valeurs.items())
+    return "{" + texte + "}"
+
+
+def texte_prometheus(instantanes):
+    """
+    Format texte d'exposition de Prometheus pour {numéro d'instrument: instantané}
+    (lisible par le « textfile collector » de node_exporter, entre autres).
+    """
+    lignes = []
+    for nom, type_, aide in COMPTEURS:
+        nom_complet = f"{PREFIXE}_{nom}_total" if type_ == "counter" else f"{PREFIXE}_{nom}"
+        lignes.append(f"# HELP {nom_complet} {aide}")
+        lignes.append(f"# TYPE {nom_complet} {type_}")
+        for numero, instantane in sorted(instantanes.items()):
+            lignes.append(f"{nom_complet}{_etiquettes(instrument=numero)} {instantane[nom]}")
+    nom_complet = f"{PREFIXE}_latence_requete_secondes"
+    lignes.append(f"# HELP {nom_complet} Latence des requêtes SCPI (envoi -> réponse)")
+    lignes.append(f"# TYPE {nom_complet} histogram")
+    for numero, instantane in sorted(instantanes.items()):
+        for commande, histogramme in sorted(instantane["latences"].items()):
+            cumul = 0
+            for borne, compte in zip(BORNES_LATENCE + ("+Inf",), histogramme["comptes"]):
+                cumul += compte
+                lignes.append(f"{nom_complet}_bucket{_etiquettes(instrument=numero, commande=commande, le=borne)}"
+                              f" {cumul}")
+            etiquettes = _etiquettes(instrument=numero, commande=commande)
+            lignes.append(f"{nom_complet}_sum{etiquettes} {histogramme['somme']!r}")
+            lignes.append(f"{nom_complet}_count{etiquettes} {histogramme['nombre']}")
+    return "\n".join(lignes) + "\n"
+
+
+class MetricsExporter:
+    """
+    Garde le dernier instantané de chaque instrument et réécrit le fichier
+    en entier à chaque mise à jour (fichier temporaire puis remplacement :
+    un lecteur ne voit jamais un fichier à moitié écrit).
+    """
+
+    def __init__(self, chemin, instantanes=None):
+        self.chemin = pathlib.Path(chemin)
+        self._instantanes = dict(instantanes or {})
+
+    def mettre_a_jour(self, numero, instantane):
+        self._instantanes[numero] = instantane
+        self.ecrire()
+
+    def ecrire(self):
+        temporaire = self.chemin.with_name(self.chemin.name + ".tmp")
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        temporaire.write_text(texte_prometheus(self._instantanes), encoding="utf-8")
+        os.replace(temporaire, self.chemin)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle Qt du tableau des mesures.
+
+Les lignes sont lues directement dans le MeasurementStore : aucune copie des
+données n'est faite et les cellules ne sont formatées que lorsque la vue les
+affiche. Les nouvelles lignes sont publiées par lots (une seule notification
+rowsInserted par rafraîchissement de l'affichage) et non échantillon par
+échantillon.
+"""
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+import profilage
+
+
+class MeasurementTableModel(QAbstractTableModel):
+    """
+    Vue tabulaire en lecture seule sur un MeasurementStore.
+    rafraichir() publie d'un coup tous les échantillons arrivés depuis le
+    précédent appel.
+    """
+
+    ENTETES = ("Temps(s)", "Volts(V)", "Ampere(A)")
+    COLONNES = ("temps", "tension", "courant")
+    FORMAT = "{:.2f}"
+    # Formats particuliers de certaines colonnes
+    FORMATS = {"instrument": "{:.0f}"}
+
+    def __init__(self, mesures, parent=None, colonnes=None, entetes=None):
+        super().__init__(parent)
+        self._mesures = mesures
+        if colonnes is not None:
+            self.COLONNES = tuple(colonnes)
+            self.ENTETES = tuple(entetes)
+        self._lignes = 0          # nombre de lignes publiées à la vue
+        self._total_publie = 0    # mesures.total au moment de la publication
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._lignes
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLONNES)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        # Les lignes publiées sont les plus anciennes du stockage
+        decalage = len(self._mesures) - (self._mesures.total - self._total_publie) - self._lignes
+        ligne = index.row() + decalage
+        nom = self.COLONNES[index.column()]
+        colonne = self._mesures.colonne(nom)
+        if not 0 <= ligne < len(colonne):
+            return None
+        return self.FORMATS.get(nom, self.FORMAT).format(colonne[ligne])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.ENTETES[section]
+        return super().headerData(section, orientation, role)
+
+    def reinitialiser(self):
+        """Resynchronise entièrement la vue, par exemple après un vider()."""
+        self.beginResetModel()
+        self._lignes, self._total_publie = len(self._mesures), self._mesures.total
+        self.endResetModel()
+
+    @profilage.mesurer
+    def rafraichir(self):
+        """Publie les échantillons ajoutés au stockage depuis le dernier appel."""
+        total, taille = self._mesures.total, len(self._mesures)
+        nouveaux = total - self._total_publie
+        if nouveaux == 0:
+            return
+        # Lignes sorties de l'anneau, à retirer en tête
+        retirees = self._lignes + nouveaux - taille
+        if nouveaux < 0 or (retirees > 0 and retirees >= self._lignes):
+            self.reinitialiser()
+            return
+        if retirees > 0:
+            self.beginRemoveRows(QModelIndex(), 0, retirees - 1)
+            self._lignes -= retirees
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), self._lignes, self._lignes + nouveaux - 1)
+        self._lignes += nouveaux
+        self._total_publie = total
+        self.endInsertRows()
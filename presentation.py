@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Regroupement des mises à jour de l'interface.
+
+Les mesures envoyées par le worker sont mises en file et l'affichage
+(graphique, afficheurs LCD, tableau, LEDs) n'est rafraîchi qu'au plus
+N fois par seconde, quelle que soit la cadence d'acquisition.
+"""
+
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSlot
+
+
+class PresentationScheduler(QObject):
+    """
+    File d'attente des échantillons à afficher.
+    soumettre() ajoute un échantillon ; la fonction de rafraîchissement est
+    appelée avec tous les échantillons en attente, au plus images_par_seconde
+    fois par seconde.
+    """
+
+    def __init__(self, rafraichir, images_par_seconde=20, parent=None):
+        super().__init__(parent)
+        self._rafraichir = rafraichir
+        self._file = []
+        self._dernier_rendu = 0.0
+        self._periode = 1.0 / images_par_seconde
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_image)
+
+    @property
+    def images_par_seconde(self):
+        return 1.0 / self._periode
+
+    @pyqtSlot(int)
+    def set_images_par_seconde(self, images_par_seconde):
+        if images_par_seconde > 0:
+            self._periode = 1.0 / images_par_seconde
+
+    @pyqtSlot(list)
+    def soumettre(self, echantillon):
+        """Met un échantillon en file et programme la prochaine image si besoin."""
+        self._file.append(echantillon)
+        if not self._timer.isActive():
+            attente = self._periode - (time.monotonic() - self._dernier_rendu)
+            self._timer.start(max(int(attente * 1000), 0))
+
+    def vider(self):
+        """Abandonne les échantillons en attente."""
+        self._timer.stop()
+        self._file = []
+
+    @pyqtSlot()
+    def _on_image(self):
+        echantillons, self._file = self._file, []
+        self._dernier_rendu = time.monotonic()
+        if echantillons:
+            self._rafraichir(echantillons)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Profilage optionnel des chemins critiques (acquisition et affichage).
+
+Activé par la variable d'environnement RS3005P_PROFIL (1, ou le chemin du
+fichier à écrire) ou par l'option --profil sur la ligne de commande. Le
+choix est fait à l'import : désactivé, le décorateur mesurer rend la
+fonction telle quelle, sans aucun coût à l'appel.
+
+Activé, chaque appel d'une fonction décorée est enregistré (début, durée)
+dans la liste du thread qui l'exécute (thread de l'interface, threads des
+workers), sans verrou. À la sortie du programme, tout est écrit au format
+« Trace Event » (JSON), lisible par chrome://tracing ou https://ui.perfetto.dev :
+
+    RS3005P_PROFIL=profil.json python ihm_rs3005p.py
+    python acquisition_sans_ihm.py --simulation --duree 10 --profil
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+from PyQt5.QtCore import QThread
+
+
+VARIABLE = "RS3005P_PROFIL"
+OPTION = "--profil"
+# Au-delà, les appels d'un thread ne sont plus enregistrés (mais comptés)
+MAX_EVENEMENTS = 2000000
+
+_valeur = os.environ.get(VARIABLE, "")
+ACTIF = bool(_valeur and _valeur != "0") or OPTION in sys.argv[1:]
+CHEMIN = _valeur if _valeur not in ("", "0", "1") else "profil_" + time.strftime("%Y-%m-%d_%H.%M.%S") + ".json"
+
+_t0 = time.perf_counter_ns()
+# identifiant du thread -> [nom, événements, appels non enregistrés]. Pas de threading.local :
+# PyQt recrée l'état Python d'un QThread à chaque appel, les données locales seraient perdues
+_threads = {}
+_verrou = threading.Lock()    # seulement pour l'ajout d'un thread
+
+
+def mesurer(fonction):
+    """Décorateur : enregistre la durée de chaque appel si le profilage est actif."""
+    if not ACTIF:
+        return fonction
+    nom = fonction.__qualname__
+
+    def enveloppe(*args, **kwargs):
+        debut = time.perf_counter_ns()
+        try:
+            return fonction(*args, **kwargs)
+        finally:
+            _enregistrer(nom, debut, time.perf_counter_ns())
+
+    enveloppe.__name__ = fonction.__name__
+    enveloppe.__qualname__ = nom
+    enveloppe.__doc__ = fonction.__doc__
+    return enveloppe
+
+
+def _enregistrer(nom, debut, fin):
+    enregistrement = _threads.get(threading.get_ident())
+    if enregistrement is None:
+        enregistrement = _nouveau_thread()
+    if len(enregistrement[1]) < MAX_EVENEMENTS:
+        enregistrement[1].append((nom, debut, fin))
+    else:
+        enregistrement[2] += 1
+
+
+def _nouveau_thread():
+    nom = threading.current_thread().name
+    if threading.current_thread() is not threading.main_thread():
+        # Les QThread ne sont pas connus du module threading (« Dummy-1 ») : nom Qt s'il y en a un
+        nom = QThread.currentThread().objectName() or nom
+    enregistrement = [nom, [], 0]
+    with _verrou:
+        _threads[threading.get_ident()] = enregistrement
+    return enregistrement
+
+
+def trace():
+    """Événements enregistrés, au format Trace Event (dict prêt pour json)."""
+    pid = os.getpid()
+    evenements = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "RS-3005P"}}]
+    ignores = {}
+    with _verrou:
+        threads = list(_threads.items())
+    for identifiant, (nom, liste, non_enregistres) in threads:
+        evenements.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": identifiant, "args": {"name": nom}})
+        if non_enregistres:
+            ignores[nom] = non_enregistres
+        for nom_zone, debut, fin in list(liste):
+            evenements.append({"name": nom_zone, "ph": "X", "pid": pid, "tid": identifiant,
+                               "ts": (debut - _t0) / 1000.0, "dur": (fin - debut) / 1000.0})
+    return {"traceEvents": evenements, "displayTimeUnit": "ms", "otherData": {"appels_non_enregistres": ignores}}
+
+
+def ecrire(chemin=None):
+    """Écrit la trace ; appelé automatiquement à la sortie du programme."""
+    chemin = chemin or CHEMIN
+    try:
+        with open(chemin, "w", encoding="utf-8") as fichier:
+            json.dump(trace(), fichier, separators=(",", ":"))
+    except OSError as e:
+        print(f"Impossible d'écrire la trace de profilage '{chemin}' : {e}", file=sys.stderr)
+        return
+    print(f"Trace de profilage écrite dans {chemin}", file=sys.stderr)
+
+
+if ACTIF:
+    atexit.register(ecrire)
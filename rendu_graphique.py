@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Rendu du graphique hors écran pour l'exportation (PNG, JPG, SVG).
+
+Les exporteurs de pyqtgraph dessinent la scène affichée et doivent tourner
+dans le thread de l'interface. Ici on prend, dans le thread de l'interface,
+une copie décimée des courbes et de l'apparence du graphique (capturer),
+puis le dessin est fait avec QPainter sur une QImage ou un QSvgGenerator,
+ce qui peut se faire dans un thread d'exportation. Le graphique affiché
+n'est pas modifié.
+"""
+
+import math
+import pathlib
+
+import numpy as np
+import pyqtgraph as pg
+
+from PyQt5.QtCore import Qt, QRectF, QPointF, QSize
+from PyQt5.QtGui import QImage, QPainter, QPen, QFont, QColor
+from PyQt5.QtSvg import QSvgGenerator
+
+
+# Marge ajoutée autour des données pour les axes en mise à l'échelle automatique
+MARGE_AUTO = 0.02
+# Marges autour de la zone de tracé (pixels) : gauche, haut, droite, bas
+MARGES = (80, 45, 25, 60)
+NB_GRADUATIONS = 6
+
+
+class GraphSnapshot:
+    """Ce qu'il faut pour redessiner le graphique, sans référence aux objets affichés."""
+
+    __slots__ = ("titre", "couleur_titre", "etiquette_x", "etiquette_y", "couleur_etiquettes",
+                 "plage_x", "plage_y", "grille", "fond", "courbes")
+
+    def __init__(self):
+        self.titre = ""
+        self.couleur_titre = QColor("black")
+        self.etiquette_x = ""
+        self.etiquette_y = ""
+        self.couleur_etiquettes = QColor("black")
+        self.plage_x = (0.0, 1.0)
+        self.plage_y = (0.0, 1.0)
+        self.grille = 0         # opacité de la grille (0-255), 0 = pas de grille
+        self.fond = QColor("white")
+        self.courbes = []       # (x, y, stylo, pinceau des symboles ou None, taille des symboles)
+
+
+def capturer(plot_widget, live_plot, nb_points=None):
+    """Copie l'état du graphique (à appeler dans le thread de l'interface)."""
+    item = plot_widget.getPlotItem()
+    instantane = GraphSnapshot()
+    instantane.titre = item.titleLabel.text
+    instantane.couleur_titre = pg.mkColor(item.titleLabel.opts.get("color") or "black")
+    axe_x, axe_y = item.getAxis("bottom"), item.getAxis("left")
+    instantane.etiquette_x = axe_x.labelText
+    instantane.etiquette_y = axe_y.labelText
+    instantane.couleur_etiquettes = pg.mkColor(axe_y.labelStyle.get("color", "black"))
+    vue = plot_widget.getViewBox()
+    instantane.plage_x, instantane.plage_y = (tuple(p) for p in vue.viewRange())
+    instantane.grille = int(axe_x.grid or 0)
+    instantane.fond = QColor(plot_widget.backgroundBrush().color())
+    for courbe, x, y in live_plot.donnees(nb_points):
+        opts = courbe.opts
+        pinceau = pg.mkBrush(opts["symbolBrush"]) if opts["symbol"] is not None else None
+        instantane.courbes.append((x, y, QPen(pg.mkPen(opts["pen"])), pinceau, opts["symbolSize"]))
+    # La vue n'applique la mise à l'échelle automatique qu'au prochain affichage :
+    # les axes automatiques sont recalculés sur les données copiées
+    auto_x, auto_y = vue.autoRangeEnabled()
+    if auto_x:
+        instantane.plage_x = _etendue([c[0] for c in instantane.courbes], instantane.plage_x)
+    if auto_y:
+        instantane.plage_y = _etendue([c[1] for c in instantane.courbes], instantane.plage_y)
+    return instantane
+
+
+def _etendue(tableaux, defaut):
+    finis = [t[np.isfinite(t)] for t in tableaux]
+    finis = [t for t in finis if len(t)]
+    if not finis:
+        return defaut
+    vmin = min(float(t.min()) for t in finis)
+    vmax = max(float(t.max()) for t in finis)
+    marge = (vmax - vmin) * MARGE_AUTO or 0.5
+    return vmin - marge, vmax + marge
+
+
+def graduations(vmin, vmax, nb=NB_GRADUATIONS):
+    """Valeurs rondes (1, 2 ou 5 x 10^k) réparties sur [vmin, vmax]."""
+    etendue = vmax - vmin
+    if not math.isfinite(etendue) or etendue <= 0:
+        return [vmin]
+    brut = etendue / max(nb, 1)
+    puissance = 10 ** math.floor(math.log10(brut))
+    pas = next(m * puissance for m in (1, 2, 5, 10) if m * puissance >= brut)
+    premier = math.ceil(vmin / pas)
+    return [k * pas for k in range(premier, int(math.floor(vmax / pas)) + 1)]
+
+
+def _texte_graduation(valeur, pas):
+    decimales = max(0, -int(math.floor(math.log10(pas)))) if pas > 0 else 0
+    return f"{valeur:.{decimales}f}"
+
+
+def dessiner(painter, largeur, hauteur, instantane):
+    """Dessine l'instantané dans un rectangle de largeur x hauteur."""
+    gauche, haut, droite, bas = MARGES
+    zone = QRectF(gauche, haut, max(largeur - gauche - droite, 1), max(hauteur - haut - bas, 1))
+    x0, x1 = instantane.plage_x
+    y0, y1 = instantane.plage_y
+    if x1 <= x0:
+        x1 = x0 + 1.0
+    if y1 <= y0:
+        y1 = y0 + 1.0
+    sx = zone.width() / (x1 - x0)
+    sy = zone.height() / (y1 - y0)
+
+    painter.fillRect(QRectF(0, 0, largeur, hauteur), instantane.fond)
+    police = QFont()
+    police.setPixelSize(12)
+    painter.setFont(police)
+
+    # Grille et graduations
+    gris = QColor(150, 150, 150)
+    grille = QColor(gris)
+    grille.setAlpha(instantane.grille)
+    tx = graduations(x0, x1)
+    ty = graduations(y0, y1)
+    pas_x = tx[1] - tx[0] if len(tx) > 1 else 0
+    pas_y = ty[1] - ty[0] if len(ty) > 1 else 0
+    for valeur in tx:
+        px = zone.left() + (valeur - x0) * sx
+        if instantane.grille:
+            painter.setPen(QPen(grille, 0))
+            painter.drawLine(QPointF(px, zone.top()), QPointF(px, zone.bottom()))
+        painter.setPen(QPen(gris, 0))
+        painter.drawLine(QPointF(px, zone.bottom()), QPointF(px, zone.bottom() + 5))
+        painter.drawText(QRectF(px - 50, zone.bottom() + 6, 100, 16), Qt.AlignHCenter | Qt.AlignTop,
+                         _texte_graduation(valeur, pas_x))
+    for valeur in ty:
+        py = zone.bottom() - (valeur - y0) * sy
+        if instantane.grille:
+            painter.setPen(QPen(grille, 0))
+            painter.drawLine(QPointF(zone.left(), py), QPointF(zone.right(), py))
+        painter.setPen(QPen(gris, 0))
+        painter.drawLine(QPointF(zone.left() - 5, py), QPointF(zone.left(), py))
+        painter.drawText(QRectF(0, py - 8, zone.left() - 8, 16), Qt.AlignRight | Qt.AlignVCenter,
+                         _texte_graduation(valeur, pas_y))
+    painter.setPen(QPen(gris, 0))
+    painter.drawRect(zone)
+
+    # Titre et étiquettes des axes
+    painter.setPen(instantane.couleur_etiquettes)
+    painter.drawText(QRectF(zone.left(), hauteur - 24, zone.width(), 20), Qt.AlignCenter, instantane.etiquette_x)
+    painter.save()
+    painter.translate(16, zone.center().y())
+    painter.rotate(-90)
+    painter.drawText(QRectF(-zone.height() / 2, -10, zone.height(), 20), Qt.AlignCenter, instantane.etiquette_y)
+    painter.restore()
+    police.setPixelSize(15)
+    painter.setFont(police)
+    painter.setPen(instantane.couleur_titre)
+    painter.drawText(QRectF(0, 8, largeur, 28), Qt.AlignCenter, instantane.titre)
+
+    # Courbes, coupées à la zone de tracé
+    painter.setClipRect(zone)
+    painter.setRenderHint(QPainter.Antialiasing)
+    for x, y, stylo, pinceau, taille in instantane.courbes:
+        if len(x) == 0:
+            continue
+        px = zone.left() + (x - x0) * sx
+        py = zone.bottom() - (y - y0) * sy
+        painter.setPen(stylo)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawPath(pg.arrayToQPath(px, py, connect="finite"))
+        if pinceau is not None:
+            painter.setBrush(pinceau)
+            rayon = taille / 2.0
+            for cx, cy in zip(px[np.isfinite(py)].tolist(), py[np.isfinite(py)].tolist()):
+                painter.drawEllipse(QPointF(cx, cy), rayon, rayon)
+    painter.setClipping(False)
+
+
+def exporter(chemin, instantane, largeur, hauteur):
+    """Écrit l'instantané en SVG (selon l'extension) ou en image (PNG, JPG...)."""
+    chemin = str(chemin)
+    if pathlib.Path(chemin).suffix.lower() == ".svg":
+        generateur = QSvgGenerator()
+        generateur.setFileName(chemin)
+        generateur.setSize(QSize(largeur, hauteur))
+        generateur.setViewBox(QRectF(0, 0, largeur, hauteur))
+        generateur.setTitle(instantane.titre)
+        painter = QPainter()
+        if not painter.begin(generateur):
+            raise OSError(f"Impossible d'écrire '{chemin}'")
+        try:
+            dessiner(painter, largeur, hauteur, instantane)
+        finally:
+            painter.end()
+        return
+    image = QImage(largeur, hauteur, QImage.Format_RGB32)
+    painter = QPainter(image)
+    try:
+        dessiner(painter, largeur, hauteur, instantane)
+    finally:
+        painter.end()
+    if not image.save(chemin):
+        raise OSError(f"Impossible d'écrire l'image '{chemin}' (format non reconnu ?)")
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Décodage de l'octet d'état renvoyé par STATUS?.
+
+La réponse est un seul octet binaire. Chaque bit est décodé une fois pour
+toutes : TABLE contient les 256 états possibles, sous forme de StatutAlim
+immuables qui portent aussi le texte affiché et l'état des LEDs. Décoder
+une réponse revient à une lecture dans la table ; deux états se comparent
+par leurs octets (bits_changes).
+
+Le verrouillage de la face avant (LOCK) n'est pas rapporté dans l'octet :
+son voyant suit la dernière commande envoyée.
+"""
+
+from collections import namedtuple
+
+
+BIT_CV1 = 0x01       # voie 1 : 1 = tension constante (C.V), 0 = courant constant (C.C)
+BIT_CV2 = 0x02       # voie 2 (modèles double voie)
+BITS_SUIVI = 0x0C    # mode de suivi des voies : 0 indépendant, 1 série, 3 parallèle
+BIT_BIP = 0x10
+BIT_OCP = 0x20
+BIT_SORTIE = 0x40
+BIT_OVP = 0x80
+
+# États des LEDs (voir classesecond.PyLedLabel)
+LED_OK = 0           # vert : actif
+LED_ETEINTE = 1      # bleu : sortie coupée
+LED_INACTIVE = 2     # orange : inactif
+
+# (LED, bits dont elle dépend) ; l'état de chaque LED est StatutAlim.leds[indice]
+LEDS = (("led_ocp", BIT_OCP), ("led_cc", BIT_CV1 | BIT_SORTIE),
+        ("led_cv", BIT_CV1 | BIT_SORTIE), ("led_pn", BIT_SORTIE))
+
+
+StatutAlim = namedtuple("StatutAlim", ("octet", "tension_constante", "voie2_tension_constante", "suivi",
+                                       "bip", "ocp", "sortie", "ovp", "texte", "leds"))
+StatutAlim.__doc__ = "État de l'alimentation décodé d'un octet STATUS? (immuable)."
+
+
+def _marche(actif):
+    return "ON" if actif else "OFF"
+
+
+def _decoder(octet):
+    tension_constante = bool(octet & BIT_CV1)
+    ocp = bool(octet & BIT_OCP)
+    sortie = bool(octet & BIT_SORTIE)
+    ovp = bool(octet & BIT_OVP)
+    suivi = (octet & BITS_SUIVI) >> 2
+    # C.C / C.V n'ont de sens que sortie active
+    cc = sortie and not tension_constante
+    cv = sortie and tension_constante
+    texte = (f"OCP {_marche(ocp)}, C.C {_marche(cc)}, C.V {_marche(cv)}, OUT {_marche(sortie)}, "
+             f"OVP {_marche(ovp)}, BIP {_marche(octet & BIT_BIP)}")
+    if suivi:
+        texte += ", SUIVI " + {1: "SÉRIE", 3: "PARALLÈLE"}.get(suivi, str(suivi))
+    if sortie:
+        led_cc = LED_OK if cc else LED_INACTIVE
+        led_cv = LED_OK if cv else LED_INACTIVE
+    else:
+        led_cc = led_cv = LED_ETEINTE
+    leds = (LED_OK if ocp else LED_INACTIVE, led_cc, led_cv, LED_OK if sortie else LED_ETEINTE)
+    return StatutAlim(octet, tension_constante, bool(octet & BIT_CV2), suivi, bool(octet & BIT_BIP),
+                      ocp, sortie, ovp, texte, leds)
+
+
+TABLE = tuple(_decoder(octet) for octet in range(256))
+
+
+def decoder(reponse):
+    """StatutAlim d'une réponse à STATUS? (texte décodé en latin-1), None si elle est vide."""
+    if not reponse:
+        return None
+    return TABLE[ord(reponse[0]) & 0xFF]
+
+
+def bits_changes(ancien, nouveau):
+    """Masque des bits qui diffèrent entre deux états (tous si ancien vaut None)."""
+    if ancien is None:
+        return 0xFF
+    return ancien.octet ^ nouveau.octet
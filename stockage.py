@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Stockage des séries de mesures (temps, tension, courant, ...).
+
+Les valeurs sont rangées dans des colonnes NumPy float64 contiguës et
+préallouées : l'ajout d'un échantillon est en O(1) (amorti en mode extensible)
+et les colonnes sont lues sous forme de vues, sans copie, pour le tracé et
+l'export.
+"""
+
+import numpy as np
+
+
+class MeasurementStore:
+    """
+    Tampon de mesures à colonnes float64.
+
+    - capacite=None : mode extensible, la capacité double quand elle est atteinte.
+    - capacite=N    : mode anneau, seuls les N derniers échantillons sont gardés.
+
+    En mode anneau chaque échantillon est écrit deux fois (à pos et pos+N), ce
+    qui garantit que les N derniers échantillons sont toujours contigus en
+    mémoire et peuvent donc être rendus sous forme de vue.
+    """
+
+    COLONNES = ("temps", "tension", "courant")
+    _CAPACITE_INITIALE = 4096
+
+    def __init__(self, capacite=None, colonnes_supp=()):
+        self._noms = self.COLONNES + tuple(colonnes_supp)
+        self._index = {nom: i for i, nom in enumerate(self._noms)}
+        self._anneau = capacite is not None
+        if self._anneau:
+            if capacite <= 0:
+                raise ValueError("La capacité doit être strictement positive.")
+            self._capacite = int(capacite)
+            self._data = np.full((len(self._noms), 2 * self._capacite), np.nan)
+        else:
+            self._capacite = self._CAPACITE_INITIALE
+            self._data = np.full((len(self._noms), self._capacite), np.nan)
+        self._taille = 0   # nombre d'échantillons présents
+        self._total = 0    # nombre d'échantillons ajoutés depuis le dernier vider()
+
+    @property
+    def noms(self):
+        return self._noms
+
+    @property
+    def capacite(self):
+        """Capacité maximale en mode anneau, None en mode extensible."""
+        return self._capacite if self._anneau else None
+
+    @property
+    def total(self):
+        """Nombre d'échantillons ajoutés depuis la création ou le dernier vider()."""
+        return self._total
+
+    def __len__(self):
+        return self._taille
+
+    def ajouter(self, *valeurs):
+        """Ajoute un échantillon (temps, tension, courant[, colonnes supp.])."""
+        if len(valeurs) < len(self.COLONNES):
+            raise ValueError(f"Il faut au moins {len(self.COLONNES)} valeurs par échantillon.")
+        if self._anneau:
+            pos = self._total % self._capacite
+            self._data[:len(valeurs), pos] = valeurs
+            self._data[:len(valeurs), pos + self._capacite] = valeurs
+            if self._taille < self._capacite:
+                self._taille += 1
+        else:
+            if self._taille == self._capacite:
+                self._agrandir(self._capacite * 2)
+            self._data[:len(valeurs), self._taille] = valeurs
+            self._taille += 1
+        self._total += 1
+
+    def ajouter_lot(self, lignes):
+        """Ajoute plusieurs échantillons d'un coup (tableau ou liste de lignes)."""
+        lignes = np.asarray(lignes, dtype=np.float64)
+        if lignes.ndim != 2 or len(lignes) == 0:
+            return
+        n, ncol = lignes.shape
+        if self._anneau:
+            if n > self._capacite:
+                # Seuls les derniers échantillons seraient conservés de toute façon
+                self._total += n - self._capacite
+                lignes = lignes[-self._capacite:]
+                n = self._capacite
+            pos = np.arange(self._total, self._total + n) % self._capacite
+            self._data[:ncol, pos] = lignes.T
+            self._data[:ncol, pos + self._capacite] = lignes.T
+            self._taille = min(self._taille + n, self._capacite)
+        else:
+            if self._taille + n > self._capacite:
+                nouvelle = self._capacite
+                while nouvelle < self._taille + n:
+                    nouvelle *= 2
+                self._agrandir(nouvelle)
+            self._data[:ncol, self._taille:self._taille + n] = lignes.T
+            self._taille += n
+        self._total += n
+
+    def _agrandir(self, nouvelle_capacite):
+        data = np.full((len(self._noms), nouvelle_capacite), np.nan)
+        data[:, :self._taille] = self._data[:, :self._taille]
+        self._data = data
+        self._capacite = nouvelle_capacite
+
+    def _bornes(self):
+        if self._anneau:
+            debut = (self._total - self._taille) % self._capacite
+            return debut, debut + self._taille
+        return 0, self._taille
+
+    def colonne(self, nom):
+        """Vue en lecture seule (sans copie) sur une colonne."""
+        debut, fin = self._bornes()
+        vue = self._data[self._index[nom], debut:fin]
+        vue.flags.writeable = False
+        return vue
+
+    def colonnes(self, *noms):
+        """Vues sur plusieurs colonnes, par défaut (temps, tension, courant)."""
+        return tuple(self.colonne(nom) for nom in (noms or self.COLONNES))
+
+    def tableau(self):
+        """Vue 2D (colonnes x échantillons) sur toutes les données."""
+        debut, fin = self._bornes()
+        vue = self._data[:, debut:fin]
+        vue.flags.writeable = False
+        return vue
+
+    def dernier(self, nom="temps"):
+        """Dernière valeur d'une colonne, None si le stockage est vide."""
+        if self._taille == 0:
+            return None
+        debut, fin = self._bornes()
+        return float(self._data[self._index[nom], fin - 1])
+
+    def vider(self):
+        """Efface les données sans libérer la mémoire préallouée."""
+        self._taille = 0
+        self._total = 0
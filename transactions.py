@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur de transactions SCPI non bloquant pour le SerialWorker.
+
+Les commandes sont placées dans une file FIFO et envoyées une par une :
+l'alimentation ne traite qu'une requête à la fois, la réponse reçue est donc
+toujours celle de la transaction en cours. Chaque transaction a son propre
+timeout et son résultat est rendu par une fonction de rappel, sans boucle
+d'événements imbriquée : le thread du worker n'est jamais bloqué.
+
+Le FrameReader découpe le flux d'octets du port en réponses complètes :
+une réponse peut arriver en plusieurs morceaux, ou collée à la suivante.
+"""
+
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal, pyqtSlot
+
+
+# Longueur fixe des réponses de l'alimentation (sans terminateur). Les autres
+# réponses (*IDN? par ex.) se terminent par DELIMITEUR ou par un silence.
+LONGUEURS_REPONSES = {"VOUT1?": 5, "IOUT1?": 5, "VSET1?": 5, "ISET1?": 5, "STATUS?": 1}
+# Réponses binaires : l'octet est transmis tel quel, même s'il vaut "\n"
+REPONSES_BINAIRES = {"STATUS?"}
+DELIMITEUR = b"\n"
+
+
+class FrameReader:
+    """
+    Tampon de réception persistant (bytearray) qui rend des trames complètes.
+
+    Les octets consommés sont retirés du début du tampon, le reste n'est ni
+    recopié ni redécodé. erreurs compte les octets rejetés (réponse non
+    sollicitée, trame tronquée après un timeout, tampon saturé, décodage).
+    """
+
+    TAILLE_MAX = 256
+    _BLANCS = b"\r\n "
+
+    def __init__(self):
+        self._tampon = bytearray()
+        self._recherche = 0  # position jusqu'où le délimiteur a déjà été cherché
+        self.erreurs = 0
+
+    def __len__(self):
+        return len(self._tampon)
+
+    def ajouter(self, octets):
+        self._tampon += octets
+        if len(self._tampon) > self.TAILLE_MAX:
+            self.rejeter()
+
+    def extraire(self, longueur=None, binaire=False):
+        """
+        Renvoie la prochaine trame (bytes) ou None si elle est incomplète.
+        longueur : taille attendue de la réponse (None si inconnue).
+        binaire : la trame fait exactement longueur octets, sans délimiteur.
+        """
+        tampon = self._tampon
+        if binaire:
+            if longueur is None or len(tampon) < longueur:
+                return None
+            return self._consommer(longueur, longueur)
+        # Blancs ou terminateur restant de la réponse précédente
+        debut = 0
+        while debut < len(tampon) and tampon[debut] in self._BLANCS:
+            debut += 1
+        if debut:
+            del tampon[:debut]
+            self._recherche = 0
+        fin = tampon.find(DELIMITEUR, self._recherche)
+        if fin != -1 and (longueur is None or fin <= longueur):
+            return self._consommer(fin, fin + len(DELIMITEUR))
+        if longueur is not None and len(tampon) >= longueur:
+            return self._consommer(longueur, longueur)
+        self._recherche = len(tampon)
+        return None
+
+    def extraire_tout(self):
+        """Renvoie tout le contenu du tampon comme une trame (fin par silence)."""
+        if not self._tampon:
+            return None
+        return self._consommer(len(self._tampon), len(self._tampon)).strip()
+
+    def rejeter(self):
+        """Vide le tampon en comptant une erreur de trame s'il n'était pas vide."""
+        if self._tampon:
+            self.erreurs += 1
+            self.vider()
+
+    def vider(self):
+        self._tampon.clear()
+        self._recherche = 0
+
+    def _consommer(self, taille, avance):
+        trame = bytes(self._tampon[:taille])
+        del self._tampon[:avance]
+        self._recherche = 0
+        return trame
+
+
+class Transaction:
+    """
+    Une commande envoyée à l'appareil.
+    reponse vaut None tant qu'aucune réponse n'est reçue (ou après un timeout).
+    t_envoi / t_reponse sont des instants time.perf_counter().
+    ecrite indique si la commande a bien été écrite sur le port.
+    longueur / binaire décrivent le format attendu de la réponse.
+    """
+
+    __slots__ = ("commande", "rappel", "timeout_ms", "attend_reponse",
+                 "longueur", "binaire", "reponse", "ecrite", "t_envoi", "t_reponse")
+
+    def __init__(self, commande, rappel=None, timeout_ms=1000, attend_reponse=True):
+        self.commande = commande
+        self.rappel = rappel
+        self.timeout_ms = timeout_ms
+        self.attend_reponse = attend_reponse
+        # Format de la réponse, aussi pour une requête tapée dans la console (« vout1? »)
+        cle = commande.strip().upper()
+        self.longueur = LONGUEURS_REPONSES.get(cle)
+        self.binaire = cle in REPONSES_BINAIRES
+        self.reponse = None
+        self.ecrite = False
+        self.t_envoi = None
+        self.t_reponse = None
+
+    def __repr__(self):
+        return f"Transaction({self.commande!r}, reponse={self.reponse!r})"
+
+
+class TransactionEngine(QObject):
+    """
+    File de transactions avec une seule requête en vol.
+
+    ecrire(octets) doit envoyer les octets sur le port et renvoyer False en
+    cas d'échec. reponse_recue(texte) doit être appelée pour chaque réponse
+    complète lue sur le port.
+    """
+
+    error_occurred = pyqtSignal(str)
+    transaction_expiree = pyqtSignal(object)  # Transaction terminée par timeout
+
+    def __init__(self, ecrire, timeout_ms=1000, parent=None):
+        super().__init__(parent)
+        self._ecrire = ecrire
+        self.timeout_ms = timeout_ms
+        self._file = deque()
+        self._en_cours = None
+        self._envoi_en_cours = False
+        # observateur(transaction) : appelé à la fin de chaque transaction (mesures, banc d'essai)
+        self.observateur = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+
+    @property
+    def en_cours(self):
+        """Transaction en attente de réponse, ou None."""
+        return self._en_cours
+
+    def __len__(self):
+        """Nombre de transactions en file ou en vol."""
+        return len(self._file) + (self._en_cours is not None)
+
+    def soumettre(self, commande, rappel=None, timeout_ms=None, attend_reponse=True):
+        """
+        Ajoute une commande à la file et renvoie sa Transaction.
+        rappel(transaction) est appelé une fois la transaction terminée.
+        """
+        transaction = Transaction(commande, rappel,
+                                  self.timeout_ms if timeout_ms is None else timeout_ms,
+                                  attend_reponse)
+        self._file.append(transaction)
+        self._suivante()
+        return transaction
+
+    def reponse_recue(self, texte):
+        """Termine la transaction en cours ; renvoie False si aucune n'attendait de réponse."""
+        transaction = self._en_cours
+        if transaction is None:
+            return False
+        self._timer.stop()
+        self._en_cours = None
+        transaction.reponse = texte
+        transaction.t_reponse = time.perf_counter()
+        self._terminer(transaction)
+        self._suivante()
+        return True
+
+    def annuler_tout(self):
+        """Abandonne toutes les transactions (fermeture du port), sans rappel."""
+        self._timer.stop()
+        self._file.clear()
+        self._en_cours = None
+
+    def _suivante(self):
+        # Évite de rentrer deux fois ici quand un rappel soumet une commande
+        if self._envoi_en_cours:
+            return
+        self._envoi_en_cours = True
+        try:
+            while self._file and self._en_cours is None:
+                transaction = self._file.popleft()
+                transaction.t_envoi = time.perf_counter()
+                transaction.ecrite = self._ecrire((transaction.commande + "\n").encode('ascii'))
+                if not transaction.ecrite:
+                    self._terminer(transaction)
+                elif transaction.attend_reponse:
+                    self._en_cours = transaction
+                    self._timer.start(transaction.timeout_ms)
+                else:
+                    self._terminer(transaction)
+        finally:
+            self._envoi_en_cours = False
+
+    @pyqtSlot()
+    def _on_timeout(self):
+        transaction = self._en_cours
+        if transaction is None:
+            return
+        self._en_cours = None
+        self.error_occurred.emit(f"Timeout lors de l'attente de la réponse à '{transaction.commande}'.")
+        self.transaction_expiree.emit(transaction)
+        self._terminer(transaction)
+        self._suivante()
+
+    def _terminer(self, transaction):
+        if self.observateur is not None:
+            self.observateur(transaction)
+        if transaction.rappel is not None:
+            transaction.rappel(transaction)
@@ -0,0 +1,513 @@
+# -*- coding: utf-8 -*-
+"""
+SerialWorker : communication série avec l'alimentation RS-3005P.
+
+Le worker est déplacé dans un QThread par son utilisateur (fenêtre
+principale ou programme sans interface) et piloté par signaux. Ce module
+n'importe ni widgets ni pyqtgraph.
+"""
+
+import random
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot, QIODevice, QTimer
+from PyQt5.QtSerialPort import QSerialPort
+
+from transactions import TransactionEngine, FrameReader
+from cadenceur import AcquisitionScheduler
+from consignes import SetpointChannel
+from metriques import WorkerMetrics
+import statut
+import profilage
+
+
+class SerialWorker(QObject):
+    """
+    Worker pour gérer la communication série dans un thread séparé.
+    Émet des signaux pour communiquer avec l'interface utilisateur.
+    """
+    # Signaux émis par le worker pour l'UI
+    port_status = pyqtSignal(bool, str)     # (succès, message)
+    data_received = pyqtSignal(str)         # Données décodées reçues (générique, pour la console)
+    error_occurred = pyqtSignal(str)        # Messages d'erreur
+
+
+    # Signal interne pour mettre une commande en file depuis un autre thread
+    _command_request = pyqtSignal(str)
+    # Signal interne pour les consignes (paramètre, valeur), regroupées par SetpointChannel
+    _setpoint_request = pyqtSignal(str, float)
+    signal_simu_received = pyqtSignal(bool)
+    table_mesures_ready = pyqtSignal(list)  # [instant (s, time.perf_counter), tension, courant]
+    #signal pour change la valeurs de temps de latence de _query
+    default_query_timeout_updated = pyqtSignal(int)
+    statut = pyqtSignal(object, int)        # (statut.StatutAlim, bits changés depuis le précédent)
+    statut_texte = pyqtSignal(str)          # Statut décodé, réponse à _request_status
+    cadence_acquisition = pyqtSignal(float, int)  # (échantillons/s obtenus, échéances manquées)
+    identification = pyqtSignal(str)        # Réponse à *IDN?, demandée à chaque ouverture du port
+    metriques_pretes = pyqtSignal(object)   # Instantané de WorkerMetrics (dict), port ouvert
+
+    # Silence (ms) qui termine une réponse sans longueur connue ni délimiteur
+    _SILENCE_FIN_TRAME_MS = 50
+    # Période par défaut de l'interrogation STATUS?, indépendante des mesures
+    _PERIODE_STATUT_MS = 1000
+    # Commandes qui changent l'état de l'alimentation : STATUS? est relu juste après
+    _COMMANDES_ETAT = ("OUT", "OCP", "LOCK", "VSET1", "ISET1")
+    # Période d'émission des métriques
+    _PERIODE_METRIQUES_MS = 1000
+    
+
+    def __init__(self):
+        super().__init__()
+        self._serial_port = QSerialPort(self)
+        self._serial_port.readyRead.connect(self._read_data)
+        self._command_request.connect(self._queue_command)
+        self._setpoint_request.connect(self._queue_setpoint)
+        self._is_open = False
+        # File des requêtes SCPI, une seule en attente de réponse à la fois
+        self._default_query_timeout_ms = 1000
+        self._transactions = TransactionEngine(self._write_data, self._default_query_timeout_ms, self)
+        self._transactions.error_occurred.connect(self.error_occurred)
+        self._transactions.transaction_expiree.connect(self._on_transaction_expiree)
+        # Latences, compteurs d'erreurs et d'octets
+        self._metriques = WorkerMetrics()
+        self._transactions.observateur = self._metriques.transaction_terminee
+        self._metriques_timer = QTimer(self)
+        self._metriques_timer.setInterval(self._PERIODE_METRIQUES_MS)
+        self._metriques_timer.timeout.connect(self._emettre_metriques)
+        # Découpage des octets reçus en réponses complètes
+        self._trames = FrameReader()
+        # Fin d'une réponse de longueur inconnue (*IDN?) : silence sur la ligne
+        self._silence_timer = QTimer(self)
+        self._silence_timer.setSingleShot(True)
+        self._silence_timer.setInterval(self._SILENCE_FIN_TRAME_MS)
+        self._silence_timer.timeout.connect(self._on_silence)
+        # Interrogation du statut à basse cadence, seuls les changements sont émis
+        self._statut_timer = QTimer(self)
+        self._statut_timer.setInterval(self._PERIODE_STATUT_MS)
+        self._statut_timer.timeout.connect(self._status_leds)
+        self._statut_en_attente = False
+        self._statut_a_relire = False   # état changé pendant qu'un STATUS? était déjà en file
+        self._dernier_statut = None
+        # Consignes VSET1/ISET1 : seule la dernière valeur demandée est envoyée
+        self._consignes = SetpointChannel(self._ecrire_consigne, parent=self)
+        # Mesure en cours (VOUT1? puis IOUT1?)
+        self._mesure_en_cours = False
+        self._tension_lue = float('nan')
+        self._instant_tension = 0.0
+        # Cadenceur des mesures, tourne dans le thread du worker
+        self._cadenceur = AcquisitionScheduler(self._lancer_mesure, self)
+        self._cadenceur.cadence_mesuree.connect(self.cadence_acquisition)
+        self._cadenceur.cadence_mesuree.connect(self._on_cadence_mesuree)
+        self._simulation_state = False
+        self.signal_simu_received.connect(self._simulation)
+    
+    @pyqtSlot(str, int)
+    def _open_port(self, port_name, baud_rate):
+        if self._simulation_state:
+            self.port_status.emit(True, "Connexion au port simulé.")
+            self.identification.emit("Simulation")
+            self._metriques_timer.start()
+        else:
+            """Ouvre le port série avec les paramètres spécifiés."""
+            if self._serial_port.isOpen():
+                self._serial_port.close()
+    
+            self._serial_port.setPortName(port_name)
+            self._serial_port.setBaudRate(baud_rate)
+            self._serial_port.setDataBits(QSerialPort.Data8)
+            self._serial_port.setParity(QSerialPort.NoParity)
+            self._serial_port.setStopBits(QSerialPort.OneStop)
+            self._serial_port.setFlowControl(QSerialPort.NoFlowControl)
+    
+            if self._serial_port.open(QIODevice.ReadWrite):
+                self._is_open = True
+                self.port_status.emit(True, f"Port '{port_name}' ouvert à {baud_rate} bauds.")
+                self.data_received.emit("Port ouvert !")
+                self._consignes.oublier()
+                self._remise_zero()  
+                self._dernier_statut = None
+                self._statut_timer.start()
+                self._metriques_timer.start()
+                self._query("*IDN?", self._on_idn)
+
+            
+            else:
+                self._is_open = False
+                error_msg = self._serial_port.errorString()
+                self.port_status.emit(False, f"Erreur d'ouverture de '{port_name}': {error_msg}")
+                self.data_received.emit("Erreur d'ouverture ")
+                self.error_occurred.emit(error_msg)
+
+    @pyqtSlot()
+    def _close_port(self):
+        """Ferme le port série."""
+        if self._metriques_timer.isActive():
+            self._metriques_timer.stop()
+            self._emettre_metriques()
+        if self._simulation_state:
+            self.port_status.emit(False, "Fermeture du port simulé.")
+        if self._serial_port.isOpen():
+            # Abandonne les requêtes encore en file pour que la remise à zéro parte tout de suite
+            self._statut_timer.stop()
+            self._consignes.oublier()
+            self._transactions.annuler_tout()
+            self._trames.vider()
+            self._mesure_en_cours = False
+            self._statut_en_attente = False
+            self._statut_a_relire = False
+            self._remise_zero()
+            self._serial_port.flush()
+            self._serial_port.close()
+            self._is_open = False
+            self.port_status.emit(False, "Port série fermé.")
+            self.data_received.emit("Port série fermé.")
+
+
+    @pyqtSlot(bytes)
+    def _write_data(self, data):
+        """Slot interne pour écrire des octets sur le port série. Renvoie False en cas d'échec."""
+        if self._is_open:
+            written_bytes = self._serial_port.write(data)
+            if written_bytes == -1:
+                self._metriques.erreurs_ecriture += 1
+                self.error_occurred.emit(f"Erreur d'écriture: {self._serial_port.errorString()}")
+                return False
+            self._metriques.octets_envoyes += written_bytes
+            return True
+        else:
+            self._metriques.erreurs_ecriture += 1
+            self.error_occurred.emit("Impossible d'écrire: le port n'est pas ouvert.")
+            return False
+
+
+
+    @pyqtSlot()
+    @profilage.mesurer
+    def _read_data(self):
+        """Slot pour lire les données disponibles quand 'readyRead' est émis."""
+        while self._serial_port.bytesAvailable():
+            octets = self._serial_port.readAll().data()
+            self._metriques.octets_recus += len(octets)
+            self._trames.ajouter(octets)
+        self._traiter_trames()
+
+
+    def _traiter_trames(self):
+        """Transmet chaque réponse complète du tampon à la transaction en attente."""
+        while self._trames:
+            transaction = self._transactions.en_cours
+            if transaction is None:
+                # Personne n'attend ces octets (réponse tardive après un timeout par ex.)
+                self._trames.rejeter()
+                self.error_occurred.emit(f"Données non sollicitées ignorées ({self._trames.erreurs} erreur(s) de trame).")
+                return
+            trame = self._trames.extraire(transaction.longueur, transaction.binaire)
+            if trame is None:
+                if transaction.longueur is None:
+                    self._silence_timer.start()
+                return
+            self._repondre(transaction, trame)
+
+
+    def _repondre(self, transaction, trame):
+        try:
+            # Réponse binaire (STATUS?) : un caractère par octet, sans strip
+            decoded_data = trame.decode('latin-1' if transaction.binaire else 'ascii')
+        except UnicodeDecodeError:
+            self._trames.erreurs += 1
+            self._metriques.erreurs_decodage += 1
+            self.error_occurred.emit(f"Erreur de décodage des données: {trame!r}")
+            decoded_data = ""
+        self.data_received.emit(decoded_data)
+        self._transactions.reponse_recue(decoded_data)
+
+
+    @pyqtSlot()
+    def _on_silence(self):
+        transaction = self._transactions.en_cours
+        if transaction is not None and transaction.longueur is None:
+            trame = self._trames.extraire_tout()
+            if trame is not None:
+                self._repondre(transaction, trame)
+        self._traiter_trames()
+
+
+    @pyqtSlot(object)
+    def _on_transaction_expiree(self, transaction):
+        # Un début de réponse tronquée ne doit pas être pris pour la réponse suivante
+        self._silence_timer.stop()
+        self._trames.rejeter()
+
+
+    @pyqtSlot(int)
+    def _set_default_query_timeout(self, new_timeout_ms):
+        if new_timeout_ms > 0: # S'assurer que le timeout est positif
+            self._default_query_timeout_ms = new_timeout_ms
+            self._transactions.timeout_ms = new_timeout_ms
+            self.data_received.emit(f"Timeout des requêtes défini à {new_timeout_ms} ms.")
+            self.default_query_timeout_updated.emit(new_timeout_ms) 
+        else:
+            self.error_occurred.emit("Le timeout des requêtes doit être une valeur positive.")
+        # PAS DE RETURN ICI ! Un pyqtSlot ne doit généralement pas retourner de valeur
+    
+    
+    def _query(self, command_string, rappel, timeout_ms = -1): 
+        """
+        Met une requête en file, sans bloquer. rappel(transaction) est appelé
+        à la réponse ; transaction.reponse vaut None en cas de timeout.
+        """
+        if not self._is_open:
+            self.error_occurred.emit("Impossible d'effectuer la requête: le port n'est pas ouvert.")
+            return None
+        actual_timeout = None
+        if timeout_ms != -1: # Si un timeout spécifique est fourni, on l'utilise à la place
+            actual_timeout = timeout_ms
+        return self._transactions.soumettre(command_string, rappel, actual_timeout)
+
+
+    def _send_command(self, command_string):
+        """
+        Met une commande textuelle en file (utilisable depuis n'importe quel thread).
+        Une requête (« ...? ») attend sa réponse, émise par data_received.
+        """
+        self._command_request.emit(command_string)
+
+
+    @pyqtSlot(str)
+    def _queue_command(self, command_string):
+        """Slot interne : place la commande dans la file, derrière les requêtes en attente."""
+        self._soumettre_commande(command_string)
+
+
+    def _soumettre_commande(self, command_string, rappel=None):
+        if not self._is_open:
+            self.error_occurred.emit("Impossible d'écrire: le port n'est pas ouvert.")
+            if rappel is not None:
+                rappel(None)
+            return
+        # Une requête (« ...? ») attend sa réponse, affichée par data_received ; seules les écritures n'attendent pas
+        requete = command_string.strip().endswith("?")
+        self._transactions.soumettre(command_string, rappel, attend_reponse=requete)
+        if self._statut_timer.isActive() and command_string.strip().upper().startswith(self._COMMANDES_ETAT):
+            # Relit le statut dès que la commande est passée (pas pendant la fermeture du port,
+            # la requête bloquerait les commandes de remise à zéro derrière elle)
+            self._status_leds()
+
+
+    @pyqtSlot()
+    def _request_idn(self):
+        """Demande l'identification de l'appareil (la réponse arrive par data_received et identification)."""
+        self._query("*IDN?", self._on_idn)
+
+
+    def _on_idn(self, transaction):
+        if transaction.reponse is not None:
+            self.identification.emit(transaction.reponse)
+    
+    
+    @pyqtSlot()
+    def _request_status(self):        
+        """Demande le statut, la version texte est émise par statut_texte."""
+        self._query("STATUS?", self._on_status_text)
+
+
+    def _on_status_text(self, transaction):
+        etat = statut.decoder(transaction.reponse) if transaction.reponse is not None else None
+        if etat is None:
+            self.error_occurred.emit("Aucune réponse de statut ou timeout.")
+            return
+        self.statut_texte.emit(etat.texte)
+
+
+    @pyqtSlot()
+    def _status_leds(self):
+        """Demande STATUS? (une seule demande en file à la fois), statut n'est émis que s'il change."""
+        if not self._is_open:
+            return
+        if self._statut_en_attente:
+            # Le STATUS? en file peut précéder la commande qui vient de changer l'état : on le relira
+            self._statut_a_relire = True
+            return
+        self._statut_en_attente = True
+        self._query("STATUS?", self._on_status_leds)
+
+
+    @profilage.mesurer
+    def _on_status_leds(self, transaction):
+        self._statut_en_attente = False
+        if self._statut_a_relire:
+            self._statut_a_relire = False
+            self._status_leds()
+        etat = statut.decoder(transaction.reponse) if transaction.reponse is not None else None
+        if etat is None:
+            return
+        bits = statut.bits_changes(self._dernier_statut, etat)
+        if bits:
+            self._dernier_statut = etat
+            self.statut.emit(etat, bits)
+
+
+    @pyqtSlot()
+    def _emettre_metriques(self):
+        self.metriques_pretes.emit(self._metriques.instantane(self._trames.erreurs, self._cadenceur.manquees_total))
+
+
+    @pyqtSlot(float, int)
+    def _on_cadence_mesuree(self, echantillons_par_s, manquees):
+        self._metriques.cadence = echantillons_par_s
+
+
+    @pyqtSlot(int)
+    def _set_status_interval(self, interval_ms):
+        """Change la période de l'interrogation du statut."""
+        if interval_ms > 0:
+            self._statut_timer.setInterval(interval_ms)
+        
+        
+    def _set_voltage(self, voltage):
+        """Définit la tension de sortie de l'alimentation (utilisable depuis n'importe quel thread)."""
+        self._setpoint_request.emit("VSET1", voltage)
+
+
+    @pyqtSlot(str, float)
+    def _queue_setpoint(self, parametre, valeur):
+        """Slot interne : confie la consigne au canal qui regroupe les écritures."""
+        if not self._is_open:
+            self.error_occurred.emit("Impossible d'écrire: le port n'est pas ouvert.")
+            return
+        self._consignes.definir(parametre, valeur)
+
+
+    def _ecrire_consigne(self, parametre, valeur, rappel):
+        self._soumettre_commande(f"{parametre}:{valeur}",
+                                 lambda transaction: rappel(transaction is not None and transaction.ecrite))
+
+
+    @staticmethod
+    def _milieu(transaction):
+        """Instant (time.perf_counter) au milieu de l'aller-retour d'une transaction."""
+        return (transaction.t_envoi + transaction.t_reponse) / 2
+
+
+    def _parse_float(self, transaction, nom):
+        """Convertit la réponse d'une transaction en float (nan si absente ou invalide)."""
+        if transaction.reponse is None:
+            return float('nan')
+        try:
+            return float(transaction.reponse)
+        except ValueError:
+            self._metriques.erreurs_decodage += 1
+            self.error_occurred.emit(f"Impossible de parser {nom} de: '{transaction.reponse}'")
+            return float('nan')
+
+    
+    def _get_voltage(self, rappel):
+        """Demande la tension de sortie, rappel(transaction) reçoit la réponse."""
+        return self._query("VOUT1?", rappel)
+
+
+    def _set_ampere(self, ampere):
+        self._setpoint_request.emit("ISET1", ampere)
+
+
+    def _get_ampere(self, rappel):
+        #Demande le courant de sortie actuel, rappel(transaction) reçoit la réponse.
+        return self._query('IOUT1?', rappel)
+
+
+    def _set_output(self, state):
+        """Active (1) ou désactive (0) la sortie de l'alimentation."""
+        self._send_command(f"OUT{int(state)}")
+        
+        
+    def _set_ocp(self, state):
+        # si ocp acitf = 1 ou inactif = 0
+        self._send_command(f"OCP{int(state)}")
+        
+        
+    @pyqtSlot(bool)
+    def _simulation(self, state):
+        self._simulation_state = state
+        self.data_received.emit("Etat simulation :{}".format(state)) 
+
+        
+    @pyqtSlot()
+    @profilage.mesurer
+    def _read_mesures(self):
+        self._lancer_mesure()
+
+
+    @profilage.mesurer
+    def _lancer_mesure(self):
+        """Lance une mesure ; renvoie False si la précédente n'est pas terminée."""
+        if self._simulation_state:
+            self.table_mesures_ready.emit([time.perf_counter(), (random.uniform(0, 30)), (random.uniform(0, 5))])
+            self._metriques.echantillons += 1
+            self._cadenceur.echantillon_termine()
+        else:
+            if not self._is_open:
+                self.error_occurred.emit("Port non ouvert pour la lecture des données.")             
+            elif self._mesure_en_cours:
+                # La mesure précédente n'est pas finie : on n'empile pas les requêtes
+                return False
+            else:                
+                # Les deux requêtes partent l'une derrière l'autre dans la file
+                self._mesure_en_cours = True
+                self._get_voltage(self._on_voltage)
+                self._get_ampere(self._on_ampere)
+        return True
+
+
+    @pyqtSlot(int)
+    def _start_acquisition(self, interval_ms):
+        """Démarre (ou redémarre) l'acquisition périodique des mesures."""
+        self._cadenceur.demarrer(interval_ms)
+
+
+    @pyqtSlot()
+    def _stop_acquisition(self):
+        self._cadenceur.arreter()
+
+
+    @pyqtSlot()
+    def _synchroniser(self):
+        """
+        Ne fait rien : appelé en BlockingQueuedConnection, il revient quand le
+        worker a traité tout ce qui lui a été envoyé avant (barrière entre threads).
+        """
+
+
+    @pyqtSlot(int)
+    def _set_acquisition_interval(self, interval_ms):
+        """Change la période des mesures, sans démarrer l'acquisition si elle est arrêtée."""
+        if self._cadenceur.actif:
+            self._cadenceur.demarrer(interval_ms)
+
+
+    def _on_voltage(self, transaction):
+        self._tension_lue = self._parse_float(transaction, "la tension")
+        # Pas d'instant de réponse après un timeout (la tension vaut alors nan)
+        self._instant_tension = self._milieu(transaction) if transaction.reponse is not None else float('nan')
+
+
+    @profilage.mesurer
+    def _on_ampere(self, transaction):
+        self._mesure_en_cours = False
+        TensionValue = self._tension_lue
+        CurrentValue = self._parse_float(transaction, "le courant")
+        if TensionValue == TensionValue and CurrentValue == CurrentValue: # pas de nan
+            # L'échantillon est daté entre la lecture de la tension et celle du courant
+            instant = (self._instant_tension + self._milieu(transaction)) / 2
+            self.table_mesures_ready.emit([instant, TensionValue, CurrentValue])
+            self._metriques.echantillons += 1
+            self._cadenceur.echantillon_termine()
+        
+        
+    def _set_lock(self, state):
+        # si ocp acitf = 1 ou inactif = 0
+        self._send_command(f"LOCK{int(state)}")
+        
+        
+    def _remise_zero(self):
+            self._send_command("ISET1:0")
+            self._send_command("VSET1:0")